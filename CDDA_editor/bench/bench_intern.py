@@ -0,0 +1,62 @@
+# bench_intern.py
+"""
+Сколько памяти экономит интернирование ключей и коротких строк при
+загрузке (jsonio.intern_pairs): все json папки разбираются без него и с
+ним, и сравнивается, сколько занимают разобранные значения и сколько
+шёл разбор.
+
+Запуск: python bench/bench_intern.py <папка, например data/json из CDDA>
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jsonio import json_load_relaxed  # noqa: E402
+
+
+def measure(raws: List[bytes], intern_strings: bool) -> float:
+    start = time.perf_counter()
+    for raw in raws:
+        json_load_relaxed(raw, intern_strings=intern_strings)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    kept = [json_load_relaxed(raw, intern_strings=intern_strings) for raw in raws]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    print(f"{'с интернированием' if intern_strings else 'без интернирования':>20}: "
+          f"{size / 1e6:.1f} МБ, разбор {elapsed:.2f} с")
+    return size
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(2)
+    raws = []
+    for path in sorted(Path(sys.argv[1]).rglob("*.json")):
+        try:
+            raw = path.read_bytes()
+            # битые файлы в замер не берём
+            json_load_relaxed(raw)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] пропускаю {path}: {e}")
+            continue
+        raws.append(raw)
+    print(f"файлов: {len(raws)}, {sum(map(len, raws)) / 1e6:.1f} МБ текста")
+    plain = measure(raws, False)
+    interned = measure(raws, True)
+    print(f"экономия: {(plain - interned) / 1e6:.1f} МБ ({1 - interned / plain:.0%})")
+
+
+if __name__ == "__main__":
+    main()
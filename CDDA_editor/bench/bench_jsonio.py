@@ -0,0 +1,76 @@
+# bench_jsonio.py
+"""
+Скорость json_load_relaxed против прежнего чтения (два re.sub по всему
+тексту, затем json.loads) на большом файле трёх видов: без комментариев,
+с комментарием в шапке и с комментарием перед каждым объектом. Новый
+разбор меряется и на str, и на bytes (прежний умел только str — ему
+байты сначала декодируются).
+
+Запуск: python bench/bench_jsonio.py [число объектов, по умолчанию 20000]
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jsonio import json_load_relaxed  # noqa: E402
+
+# лучший из стольких запусков
+REPEAT = 15
+
+
+def old_json_load_relaxed(text: str) -> Any:
+    """Чтение до jsonio: портит "//" внутри строк, но так оно и работало."""
+    text = re.sub(r"//.*", "", text)
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    return json.loads(text)
+
+
+def _objects(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "MONSTER", "id": f"mon_{i}", "name": {"str": f"monster {i}"},
+            "description": "Нечто с длинным описанием, какие в данных CDDA встречаются часто.",
+            "color": "c_red", "hp": 100 + i % 50, "speed": 100, "volume": "62500 ml",
+            "flags": ["SEES", "HEARS", "SMELLS", "WARM", "BASHES"],
+            "special_attacks": [["GRAB", 7]],
+        }
+        for i in range(count)
+    ]
+
+
+def _cases(count: int) -> Dict[str, str]:
+    body = json.dumps(_objects(count), ensure_ascii=False, indent=2)
+    return {
+        "без комментариев": body,
+        "комментарий в шапке": "// шапка файла\n/* и ещё\n   несколько строк */\n" + body,
+        # комментарий строкой над каждым объектом
+        "комментарий на объект": body.replace('\n  {\n    "type"', '\n  // объект\n  {\n    "type"'),
+    }
+
+
+def _best(fn: Callable[[], Any]) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    for name, text in _cases(count).items():
+        raw = text.encode("utf-8")
+        assert json_load_relaxed(text) == json_load_relaxed(raw) == old_json_load_relaxed(text)
+        old = _best(lambda: old_json_load_relaxed(text))
+        old_bytes = _best(lambda: old_json_load_relaxed(raw.decode("utf-8")))
+        new = _best(lambda: json_load_relaxed(text))
+        new_bytes = _best(lambda: json_load_relaxed(raw))
+        print(f"{name:>22} ({len(raw) / 1e6:.1f} МБ): str {old:.3f} → {new:.3f} с, "
+              f"bytes {old_bytes:.3f} → {new_bytes:.3f} с")
+
+
+if __name__ == "__main__":
+    main()
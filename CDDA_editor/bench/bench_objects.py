@@ -0,0 +1,82 @@
+# bench_objects.py
+"""
+Память и время подписей ModObject: нынешний (slots, кэш id/имени/подписи)
+против прежнего вида — обычного dataclass, который считает подпись
+заново при каждой перестройке дерева.
+
+Запуск: python bench/bench_objects.py [число объектов, по умолчанию 100000]
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project import ModObject, object_display_name, object_id  # noqa: E402
+
+# сколько раз перестраиваем «дерево» (по подписи на объект за раз)
+LABEL_PASSES = 5
+
+
+@dataclass
+class PlainModObject:
+    """ModObject до оптимизации: с __dict__, без кэшей."""
+
+    schema_key: str
+    json_type: str
+    file_path: Path
+    data: Dict[str, Any]
+
+    def get_id(self) -> str:
+        return object_id(self.schema_key, self.data)
+
+    def get_display_name(self) -> str:
+        return object_display_name(self.schema_key, self.data)
+
+    def label(self) -> str:
+        i = self.get_id()
+        n = self.get_display_name()
+        if i and n and i != n:
+            return f"{i} — {n}"
+        return i or n or "<объект>"
+
+
+def _monsters(count: int) -> List[Dict[str, Any]]:
+    return [{"type": "MONSTER", "id": f"mon_{i}", "name": {"str": f"monster {i}"}} for i in range(count)]
+
+
+def measure(name: str, make: Callable[[Dict[str, Any]], Any], count: int) -> None:
+    datas = _monsters(count)
+    gc.collect()
+    tracemalloc.start()
+    objs = [make(data) for data in datas]
+    created = tracemalloc.get_traced_memory()[0]
+    for obj in objs:
+        obj.label()
+    labelled = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(LABEL_PASSES):
+        for obj in objs:
+            obj.label()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: объекты {created / 1e6:.1f} МБ, с подписями {labelled / 1e6:.1f} МБ, "
+          f"{LABEL_PASSES}× label() {elapsed:.3f} с")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    path = Path("bench.json")
+    print(f"объектов: {count}")
+    measure("dataclass", lambda data: PlainModObject("monster", "MONSTER", path, data), count)
+    measure("ModObject", lambda data: ModObject("monster", "MONSTER", path, data), count)
+
+
+if __name__ == "__main__":
+    main()
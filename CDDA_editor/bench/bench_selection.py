@@ -0,0 +1,88 @@
+# bench_selection.py
+"""
+Задержка смены объекта в редакторе и число виджетов: по монстрам с ~40
+полями редактор переключается подряд (set_object + обработка событий,
+как при выборе в дереве). С пулом строк и редакторов виджетов после
+первых объектов больше не становится.
+
+Запуск: python bench/bench_selection.py [число объектов, по умолчанию 200]
+(без экрана — с QT_QPA_PLATFORM=offscreen)
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt5.QtWidgets import QApplication, QWidget  # noqa: E402
+
+from editor import ObjectEditorWidget  # noqa: E402
+from project import ModProject  # noqa: E402
+from schemas import COMPILED_SCHEMAS, schema_key_for_type  # noqa: E402
+
+# полей у каждого объекта (поля схемы плюс лишние до этого числа)
+FIELDS_PER_OBJECT = 40
+
+SAMPLE_VALUES: Dict[str, Any] = {
+    "string": "text", "int": 1, "float": 1.5, "bool": True,
+    "list_string": ["a", "b"], "flags": ["F1", "F2"], "ref_list": ["ref"],
+    "json": {"k": [1, 2]}, "string_or_translation": {"str": "name"},
+}
+
+
+def _monsters(count: int) -> List[Dict[str, Any]]:
+    schema = COMPILED_SCHEMAS[schema_key_for_type("MONSTER")]
+    objs = []
+    for i in range(count):
+        obj: Dict[str, Any] = {"type": "MONSTER", "id": f"mon_{i}"}
+        for key, kind in schema.field_kinds.items():
+            choices = schema.field_choices.get(key)
+            obj.setdefault(key, choices[0] if choices else SAMPLE_VALUES.get(kind, f"v{i}"))
+        for extra in range(FIELDS_PER_OBJECT - len(obj)):
+            obj[f"extra_{extra}"] = extra
+        objs.append(obj)
+    return objs
+
+
+def _percentile(values: List[float], share: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as folder:
+        Path(folder, "monsters.json").write_text(json.dumps(_monsters(count)), encoding="utf-8")
+        project = ModProject(load_workers=0)
+        project.load_from_dir(folder)
+    objs = list(project.objects_by_schema[schema_key_for_type("MONSTER")])
+
+    editor = ObjectEditorWidget(project)
+    editor.resize(900, 700)
+    editor.show()
+    app.processEvents()
+    latencies = []
+    widgets = []
+    for obj in objs:
+        start = time.perf_counter()
+        editor.set_object(obj)
+        app.processEvents()
+        latencies.append(time.perf_counter() - start)
+        widgets.append(len(editor.findChildren(QWidget)))
+    editor.shutdown()
+
+    print(f"объектов: {len(objs)}, полей у каждого: {len(objs[0].data)}")
+    print(f"смена объекта: первая {latencies[0] * 1e3:.1f} мс, медиана {_percentile(latencies, 0.5) * 1e3:.1f} мс, "
+          f"p90 {_percentile(latencies, 0.9) * 1e3:.1f} мс")
+    print(f"виджетов: после первого {widgets[0]}, после последнего {widgets[-1]}, максимум {max(widgets)}")
+    if project.dirty_files:
+        print(f"[WARN] после просмотра помечены изменёнными: {len(project.dirty_files)}")
+
+
+if __name__ == "__main__":
+    main()
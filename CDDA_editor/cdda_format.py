@@ -0,0 +1,156 @@
+# cdda_format.py
+"""
+Сериализация JSON в стиле json_formatter из репозитория CDDA.
+
+Правила форматтера (tools/format):
+- отступ — два пробела на уровень;
+- файл-массив и объекты верхнего уровня всегда разворачиваются: по
+  элементу/полю на строку;
+- всё, что глубже, пишется в одну строку ({ "a": 1 }, [ "X", "Y" ]), если
+  эта запись вместе с разделителем перед ней занимает не больше 120 байт
+  UTF-8; иначе разворачивается, и правило применяется к её элементам;
+- массивы "rows" и "blueprint" (карты) из нескольких строк разворачиваются всегда;
+- дробное число с нулевой дробной частью пишется как целое (1.0 → 1);
+- пустые массив и объект — "[ ]" и "{ }".
+
+Отличие одно: форматтер переписывает дробные числа как в исходном тексте,
+а здесь текста уже нет — пишется кратчайшая запись того же числа (0.50 → 0.5).
+
+Запуск как скрипта сверяет файлы (по умолчанию — format_corpus рядом) с
+их переформатированием: python cdda_format.py [файлы или папки...]
+"""
+from __future__ import annotations
+
+import sys
+from json.encoder import encode_basestring
+from pathlib import Path
+from typing import Any, Iterable, List
+
+from jsonio import json_load_relaxed
+
+# предел длины однострочной записи, байт
+LINE_LIMIT = 120
+# массивы этих полей из нескольких элементов всегда разворачиваются
+WRAP_KEYS = frozenset(("rows", "blueprint"))
+INDENT = "  "
+
+CORPUS_DIR = Path(__file__).with_name("format_corpus")
+
+
+def _size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _flat(value: Any, depth: int, level: int) -> str:
+    """
+    Запись в одну строку. Исключение — "rows"/"blueprint": форматтер
+    разворачивает их и внутри однострочной записи.
+    """
+    if isinstance(value, dict):
+        if not value:
+            return "{ }"
+        parts = []
+        for k, v in value.items():
+            if k in WRAP_KEYS and isinstance(v, list) and len(v) > 1:
+                text = _format(v, depth + 1, level + 1, True)
+            else:
+                text = _flat(v, depth + 1, level + 1)
+            parts.append(f"{encode_basestring(k)}: {text}")
+        return "{ " + ", ".join(parts) + " }"
+    if isinstance(value, list):
+        if not value:
+            return "[ ]"
+        return "[ " + ", ".join([_flat(v, depth + 1, level + 1) for v in value]) + " ]"
+    return _scalar(value)
+
+
+def _format(value: Any, depth: int, level: int, wrap: bool = False, separator: int = 0) -> str:
+    """
+    value на глубине depth (0 — весь файл), level — отступ строки, с
+    которой value начинается; separator — длина разделителя перед value,
+    форматтер считает его в длину записи.
+    """
+    if not isinstance(value, (dict, list)) or not value:
+        # пустой массив или объект на любой глубине — в одну строку
+        return _flat(value, depth, level)
+    if depth > 1 and not wrap:
+        flat = _flat(value, depth, level)
+        if separator + _size(flat) <= LINE_LIMIT:
+            return flat
+    inner = "\n" + INDENT * (level + 1)
+    close = "\n" + INDENT * level
+    if isinstance(value, dict):
+        parts = [
+            f"{encode_basestring(k)}: "
+            + _format(v, depth + 1, level + 1, k in WRAP_KEYS and isinstance(v, list) and len(v) > 1)
+            for k, v in value.items()
+        ]
+        return "{" + inner + ("," + inner).join(parts) + close + "}"
+    parts = []
+    gap = 1 + len(inner)
+    for i, item in enumerate(value):
+        parts.append(_format(item, depth + 1, level + 1, separator=gap if i else 0))
+    return "[" + inner + ("," + inner).join(parts) + close + "]"
+
+
+def format_json(value: Any) -> str:
+    """Текст файла целиком (с переводом строки в конце)."""
+    return _format(value, 0, 0) + "\n"
+
+
+def format_element(value: Any) -> str:
+    """
+    Элемент файла-массива — так, как он стоит в файле после "[\\n  ":
+    без отступа в первой строке, остальные строки с отступом от края файла.
+    """
+    return _format(value, 1, 1)
+
+
+def join_elements(texts: List[str]) -> str:
+    """Файл-массив из текстов format_element; то же, что format_json(список)."""
+    if not texts:
+        return format_json([])
+    return "[\n" + INDENT + (",\n" + INDENT).join(texts) + "\n]\n"
+
+
+# ---------- сверка ----------
+
+def _json_files(paths: Iterable[Path]) -> Iterable[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.rglob("*.json"))
+        else:
+            yield path
+
+
+def mismatches(paths: Iterable[Path]) -> List[Path]:
+    """Файлы, которые после разбора и форматирования получаются не такими, как на диске."""
+    found = []
+    for path in _json_files(paths):
+        text = path.read_text(encoding="utf-8-sig")
+        if format_json(json_load_relaxed(text)) != text.replace("\r\n", "\n"):
+            found.append(path)
+    return found
+
+
+if __name__ == "__main__":
+    targets = [Path(arg) for arg in sys.argv[1:]] or [CORPUS_DIR]
+    bad = mismatches(targets)
+    for path in bad:
+        print(f"[WARN] не совпадает с форматтером: {path}")
+    print(f"проверено, расхождений: {len(bad)}")
+    sys.exit(1 if bad else 0)
@@ -1,9 +1,12 @@
 # editor.py
 from __future__ import annotations
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
-from PyQt5.QtCore import Qt, pyqtSignal, QEvent
+import json
+
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QEvent, QObject, QThread, QTimer
 from PyQt5.QtWidgets import (
+    QApplication,
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
@@ -24,11 +27,15 @@ from PyQt5.QtWidgets import (
     QDialogButtonBox,
     QSizePolicy,
     QAbstractItemView,
+    QTreeView,
 )
-from PyQt5.QtGui import QTextOption
+from PyQt5.QtGui import QColor, QTextCursor, QTextFormat, QTextOption
 
-from schemas import SCHEMAS
+from schemas import CompiledSchema, COMPILED_SCHEMAS, field_kind, field_choices, json_type_for_ref
 from project import ModProject, ModObject
+from jsonio import json_load_relaxed, json_dumps_pretty
+from json_tree import JsonTreeModel
+from id_models import IdListModel, IdModels, make_id_completer
 
 
 class ClickableLabel(QLabel):
@@ -41,12 +48,13 @@ class ClickableLabel(QLabel):
 
 
 class RefListWidget(QWidget):
-    def __init__(self, project: ModProject, ref_type: str,
+    # список id изменён пользователем
+    changed = pyqtSignal()
+
+    def __init__(self, id_model: IdListModel,
                  initial: Optional[List[str]] = None,
                  parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
-        self.project = project
-        self.ref_type = ref_type
 
         self.list_widget = QListWidget(self)
         # можно редактировать элементы вручную
@@ -54,17 +62,14 @@ class RefListWidget(QWidget):
             QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked
         )
 
-        for val in initial or []:
-            if val:
-                QListWidgetItem(str(val), self.list_widget)
-
-        self.combo = QComboBox(self)
-        self.combo.setEditable(True)  # можно вбить свой ID
+        self.set_values(initial or [])
+        self.list_widget.itemChanged.connect(self.changed)
 
-        json_type = SCHEMAS.get(ref_type, {}).get("json_type", ref_type)
-        ids = self.project.get_ids_for_json_type(json_type)
-        for ident in ids:
-            self.combo.addItem(ident)
+        # можно вбить свой ID; подсказки — из общей модели id этого типа
+        self.id_edit = QLineEdit(self)
+        self.id_edit.setPlaceholderText("начни вводить ID…")
+        self.id_edit.setCompleter(make_id_completer(id_model, self.id_edit))
+        self.id_edit.returnPressed.connect(self._on_add)
 
         add_btn = QPushButton("Добавить", self)
         del_btn = QPushButton("Удалить выбранное", self)
@@ -74,7 +79,7 @@ class RefListWidget(QWidget):
 
         top = QHBoxLayout()
         top.addWidget(QLabel("ID:", self))
-        top.addWidget(self.combo)
+        top.addWidget(self.id_edit)
         top.addWidget(add_btn)
 
         layout = QVBoxLayout(self)
@@ -83,24 +88,248 @@ class RefListWidget(QWidget):
         layout.addWidget(del_btn)
         layout.setContentsMargins(0, 0, 0, 0)
 
+    def set_values(self, values: List[Any]) -> None:
+        self.list_widget.clear()
+        for val in values:
+            if val:
+                QListWidgetItem(str(val), self.list_widget)
+
     def _on_add(self) -> None:
-        text = self.combo.currentText().strip()
+        text = self.id_edit.text().strip()
         if not text:
             return
         for i in range(self.list_widget.count()):
             if self.list_widget.item(i).text() == text:
                 return
         QListWidgetItem(text, self.list_widget)
+        self.id_edit.clear()
+        self.changed.emit()
 
     def _on_delete(self) -> None:
         row = self.list_widget.currentRow()
         if row >= 0:
             self.list_widget.takeItem(row)
+            self.changed.emit()
 
     def value(self) -> List[str]:
         return [self.list_widget.item(i).text() for i in range(self.list_widget.count())]
 
 
+class JsonValidator(QObject):
+    """
+    Разбирает текст json-полей в отдельном потоке (см. ObjectEditorWidget).
+
+    Ошибки возвращаются со строкой и столбцом (1-based, 0 — неизвестно).
+    """
+
+    # (поле-отправитель, поколение текста, значение, ошибка, строка, столбец)
+    parsed = pyqtSignal(object, int, object, str, int, int)
+
+    @pyqtSlot(object, int, str)
+    def validate(self, owner: object, generation: int, text: str) -> None:
+        value, error, line, col = parse_json_text(text)
+        self.parsed.emit(owner, generation, value, error, line, col)
+
+
+def parse_json_text(text: str) -> Tuple[Any, str, int, int]:
+    """(значение, ошибка, строка, столбец); пустой текст — пустой объект."""
+    if not text.strip():
+        return {}, "", 0, 0
+    try:
+        return json_load_relaxed(text), "", 0, 0
+    except json.JSONDecodeError as e:
+        return None, e.msg, e.lineno, e.colno
+    except ValueError as e:
+        return None, str(e), 0, 0
+
+
+class JsonFieldWidget(QWidget):
+    """
+    Редактор json-поля: текст плюс строка ошибки под ним.
+
+    Текст проверяется в фоне, когда пользователь перестал печатать; ошибка
+    подсвечивается прямо в тексте. Разобранное значение запоминается, так
+    что запись в объект повторно текст не разбирает.
+
+    Вместо текста можно включить дерево (JsonTreeModel): оно ничего не
+    сериализует заранее и правит значения прямо в данных объекта.
+    """
+
+    # текст изменён пользователем
+    edited = pyqtSignal()
+    validate_requested = pyqtSignal(object, int, str)
+    # пользователь переключил текст/дерево
+    tree_mode_toggled = pyqtSignal(bool)
+    # значение поменяли в дереве (уже записано в данные)
+    tree_edited = pyqtSignal()
+
+    # пауза в наборе, после которой запускается проверка, мс
+    DEBOUNCE_MS = 400
+
+    def __init__(self, validator: JsonValidator, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.edit = QTextEdit(self)
+        self.error_label = QLabel(self)
+        self.error_label.setStyleSheet("color: #e05050;")
+        self.error_label.setWordWrap(True)
+        self.error_label.hide()
+
+        self.tree_btn = QPushButton("Дерево", self)
+        self.tree_btn.setCheckable(True)
+        self.tree_btn.setToolTip("Показать значение деревом: уровни раскрываются по мере надобности.")
+        self.tree_btn.toggled.connect(self.tree_mode_toggled)
+        # дерево создаётся при первом включении
+        self.tree_view: Optional[QTreeView] = None
+        self.tree_model: Optional[JsonTreeModel] = None
+        # сейчас показано дерево (кнопка уже может быть нажата, а дерево ещё нет)
+        self._tree_shown = False
+
+        bottom = QHBoxLayout()
+        bottom.addWidget(self.error_label, 1)
+        bottom.addStretch()
+        bottom.addWidget(self.tree_btn)
+
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._layout.addWidget(self.edit)
+        self._layout.addLayout(bottom)
+
+        # поколение растёт с каждой правкой; ответы для старых поколений выбрасываются
+        self._generation = 0
+        self._parsed_generation = -1
+        self._value: Any = None
+        self._error = ""
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._request_validation)
+
+        self.edit.textChanged.connect(self._on_text_changed)
+        self._validator = validator
+        self.validate_requested.connect(validator.validate)
+        validator.parsed.connect(self._on_parsed)
+
+    def set_value(self, val: Any, tree: bool = False) -> None:
+        """
+        Показывает значение; оно же считается уже разобранным.
+
+        tree — показать деревом (только для dict/list). Дерево смотрит
+        в сам val, так что правки в нём попадают прямо в данные объекта.
+        """
+        is_container = isinstance(val, (dict, list))
+        tree = tree and is_container
+        self.tree_btn.blockSignals(True)
+        self.tree_btn.setEnabled(is_container)
+        self.tree_btn.setChecked(tree)
+        self.tree_btn.blockSignals(False)
+
+        self._timer.stop()
+        self._generation += 1
+        self._set_result(self._generation, {} if val is None else val, "", 0, 0)
+        self._tree_shown = tree
+        if tree:
+            # текст в режиме дерева не строится вовсе
+            self._show_tree(val)
+            return
+
+        self._set_text(val)
+        if self.tree_view is not None:
+            self.tree_view.hide()
+            self.tree_model.set_root(None)
+        self.edit.show()
+
+    def _set_text(self, val: Any) -> None:
+        text = ""
+        if val is not None:
+            try:
+                text = json_dumps_pretty(val)
+            except Exception:
+                text = str(val)
+        self.edit.blockSignals(True)
+        try:
+            self.edit.setPlainText(text)
+        finally:
+            self.edit.blockSignals(False)
+
+    def _show_tree(self, val: Any) -> None:
+        if self.tree_view is None:
+            self.tree_model = JsonTreeModel(self)
+            self.tree_model.value_edited.connect(self.tree_edited)
+            self.tree_view = QTreeView(self)
+            self.tree_view.setModel(self.tree_model)
+            self.tree_view.setUniformRowHeights(True)
+            self.tree_view.setEditTriggers(
+                QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed
+            )
+            self.tree_view.setMinimumHeight(200)
+            self._layout.insertWidget(1, self.tree_view)
+        self.tree_model.set_root(val)
+        self.edit.hide()
+        self.tree_view.show()
+
+    def is_tree_mode(self) -> bool:
+        return self._tree_shown
+
+    def value(self) -> Tuple[Any, str]:
+        """(значение, ошибка) для текущего текста; если фон ещё не успел — разбор на месте."""
+        if self.is_tree_mode():
+            return self._value, ""
+        if self._parsed_generation != self._generation:
+            self._timer.stop()
+            self._set_result(self._generation, *parse_json_text(self.edit.toPlainText()))
+        return self._value, self._error
+
+    def _on_text_changed(self) -> None:
+        self._generation += 1
+        self._timer.start()
+        self.edited.emit()
+
+    def _request_validation(self) -> None:
+        # поток проверки запускается при первой надобности
+        thread = self._validator.thread()
+        if not thread.isRunning():
+            thread.start()
+        self.validate_requested.emit(self, self._generation, self.edit.toPlainText())
+
+    def _on_parsed(self, owner: object, generation: int, value: Any,
+                   error: str, line: int, col: int) -> None:
+        if owner is self and generation == self._generation:
+            self._set_result(generation, value, error, line, col)
+
+    def _set_result(self, generation: int, value: Any, error: str, line: int, col: int) -> None:
+        self._parsed_generation = generation
+        self._value = value
+        self._error = error
+        if not error:
+            self.error_label.hide()
+            self.edit.setExtraSelections([])
+            return
+
+        where = f"строка {line}, столбец {col}: " if line else ""
+        self.error_label.setText(f"Ошибка JSON, {where}{error}")
+        self.error_label.show()
+        if not line:
+            self.edit.setExtraSelections([])
+            return
+
+        # подсветка строки с ошибкой и символа, на котором разбор споткнулся
+        block = self.edit.document().findBlockByNumber(line - 1)
+        line_sel = QTextEdit.ExtraSelection()
+        line_sel.format.setBackground(QColor(224, 80, 80, 60))
+        line_sel.format.setProperty(QTextFormat.FullWidthSelection, True)
+        line_sel.cursor = QTextCursor(block)
+
+        char_sel = QTextEdit.ExtraSelection()
+        char_sel.format.setBackground(QColor(224, 80, 80, 160))
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor, max(col - 1, 0))
+        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
+        char_sel.cursor = cursor
+
+        self.edit.setExtraSelections([line_sel, char_sel])
+
+
 class NewFieldDialog(QDialog):
     """Диалог для создания произвольного поля."""
 
@@ -182,7 +411,8 @@ class ResizableRow(QWidget):
         self.handle.setCursor(Qt.SizeVerCursor)
         vlayout.addWidget(self.handle)
 
-        btn.clicked.connect(lambda _=False, k=key: self.parent_editor._delete_field(k))
+        # строка переиспользуется для разных полей, поэтому ключ берём в момент нажатия
+        btn.clicked.connect(lambda _=False: self.parent_editor._delete_field(self.key))
 
         self._resizing = False
         self._drag_start_global_y = 0
@@ -193,6 +423,11 @@ class ResizableRow(QWidget):
 
         self.handle.installEventFilter(self)
 
+    def reset_height(self) -> None:
+        """Забыть высоту, натянутую пользователем (строку отдают другому полю)."""
+        if self.resizable:
+            self.setMinimumHeight(self._min_height)
+
     def eventFilter(self, obj, event):
         if obj is self.handle and self.resizable:
             if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
@@ -214,14 +449,78 @@ class ResizableRow(QWidget):
         return super().eventFilter(obj, event)
 
 
+# вид редактора поля: field_kind плюс json_type ссылок для ref_list
+PoolKey = Tuple[str, Optional[str]]
+
+# высота заглушки, пока для вида редактора не известна настоящая
+DEFAULT_ROW_HEIGHT = 30
+
+
+class FieldEditor:
+    """Редактор поля в обёртке ResizableRow. Живёт в пуле и переиспользуется."""
+
+    __slots__ = ("pool_key", "row", "editor")
+
+    def __init__(self, pool_key: PoolKey, row: ResizableRow, editor: QWidget) -> None:
+        self.pool_key = pool_key
+        self.row = row
+        self.editor = editor
+
+
+class FieldSlot:
+    """
+    Строка формы: подпись и место под редактор. Пока строка далеко от
+    видимой области, вместо редактора там пустой виджет примерной высоты.
+    """
+
+    __slots__ = ("label", "holder", "key", "pool_key", "editor")
+
+    def __init__(self, label: ClickableLabel, holder: QWidget) -> None:
+        self.label = label
+        self.holder = holder
+        self.key = ""
+        self.pool_key: PoolKey = ("", None)
+        self.editor: Optional[FieldEditor] = None
+
+
 class ObjectEditorWidget(QWidget):
+    # короткое сообщение для строки состояния
+    message = pyqtSignal(str)
+
     def __init__(self, project: ModProject, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
         self.project = project
         self.current_obj: Optional[ModObject] = None
-        self.current_schema: Optional[Dict[str, Any]] = None
+        self.current_schema: Optional[CompiledSchema] = None
         self.field_widgets: Dict[str, QWidget] = {}
         self.fields_meta: Dict[str, Dict[str, Any]] = {}
+        # тип виджета для каждого поля (см. schemas.field_kind)
+        self.field_kinds: Dict[str, str] = {}
+        # общие на все формы модели id для подсказок в ref_list-полях
+        self.id_models = IdModels(project.id_registry, self)
+        # строки формы и запасы готовых строк/редакторов: при смене объекта
+        # виджеты не пересоздаются, а получают новые значения. Редакторы
+        # создаются только для строк рядом с видимой областью (см. _materialize_visible)
+        self._slots: List[FieldSlot] = []
+        self._slot_pool: List[FieldSlot] = []
+        self._editor_pool: Dict[PoolKey, List[FieldEditor]] = {}
+        # примерная высота строки по виду редактора — для заглушек
+        self._row_heights: Dict[PoolKey, int] = {}
+        self._materialize_scheduled = False
+        # поля, которые пользователь менял с момента показа объекта;
+        # apply_changes читает только их
+        self._dirty_fields: set[str] = set()
+        # json-поля, которые пользователь смотрит деревом (по ключу, между объектами)
+        self._json_tree_keys: set[str] = set()
+
+        # фоновая проверка json-полей: один поток на все поля,
+        # стартует при первой проверке (см. JsonFieldWidget)
+        self._json_thread = QThread(self)
+        self._json_validator = JsonValidator()
+        self._json_validator.moveToThread(self._json_thread)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
 
         self.header_label = QLabel("Ничего не выбрано", self)
 
@@ -241,10 +540,15 @@ class ObjectEditorWidget(QWidget):
 
         inner = QWidget(self)
         inner.setLayout(self.form)
+        self._inner = inner
 
         scroll = QScrollArea(self)
         scroll.setWidgetResizable(True)
         scroll.setWidget(inner)
+        self._scroll = scroll
+        scroll.verticalScrollBar().valueChanged.connect(self._schedule_materialize)
+        scroll.verticalScrollBar().rangeChanged.connect(self._schedule_materialize)
+        scroll.viewport().installEventFilter(self)
 
         layout = QVBoxLayout(self)
         layout.addWidget(self.header_label)
@@ -254,13 +558,44 @@ class ObjectEditorWidget(QWidget):
 
         self._clear_add_combo()
 
+    def shutdown(self) -> None:
+        """Останавливает фоновый поток (вызывать при закрытии окна)."""
+        if self._json_thread.isRunning():
+            self._json_thread.quit()
+            self._json_thread.wait()
+
     def clear_form(self) -> None:
-        while self.form.rowCount():
-            self.form.removeRow(0)
+        self._resize_slots(0)
         self.field_widgets.clear()
         self.fields_meta.clear()
+        self.field_kinds.clear()
         self._clear_add_combo()
 
+    def _resize_slots(self, count: int) -> None:
+        """Оставляет в форме count строк: лишние уходят в пул, недостающие берутся из него."""
+        while len(self._slots) > count:
+            slot = self._slots.pop()
+            self._release_editor(slot)
+            # takeRow, в отличие от removeRow, виджеты не удаляет
+            self.form.takeRow(self.form.rowCount() - 1)
+            slot.label.hide()
+            slot.holder.hide()
+            self._slot_pool.append(slot)
+        while len(self._slots) < count:
+            if self._slot_pool:
+                slot = self._slot_pool.pop()
+            else:
+                label = ClickableLabel()
+                label.clicked.connect(self._on_label_clicked)
+                holder = QWidget()
+                holder_layout = QVBoxLayout(holder)
+                holder_layout.setContentsMargins(0, 0, 0, 0)
+                slot = FieldSlot(label, holder)
+            self.form.addRow(slot.label, slot.holder)
+            slot.label.show()
+            slot.holder.show()
+            self._slots.append(slot)
+
     def _clear_add_combo(self) -> None:
         self.add_combo.clear()
         self.add_combo.addItem("— выбери поле —", None)
@@ -276,32 +611,119 @@ class ObjectEditorWidget(QWidget):
             self.clear_form()
             return
 
-        self.current_schema = SCHEMAS[obj.schema_key]
-        self.header_label.setText(
-            f"{self.current_schema.get('label', obj.schema_key)}   (type: {obj.json_type})"
-        )
+        self.current_schema = COMPILED_SCHEMAS[obj.schema_key]
+        self.header_label.setText(f"{self.current_schema.label}   (type: {obj.json_type})")
+        self._scroll.verticalScrollBar().setValue(0)
         self._rebuild_form()
 
     def _rebuild_form(self) -> None:
-        self.clear_form()
+        self._dirty_fields.clear()
+        self.field_widgets.clear()
+        self.fields_meta.clear()
+        self.field_kinds.clear()
         if not self.current_obj or not self.current_schema:
+            self.clear_form()
             return
 
-        schema_fields = self.current_schema.get("fields", {})
+        schema = self.current_schema
         obj_data = self.current_obj.data
 
         # реальные ключи объекта
         for key, value in obj_data.items():
-            if key in schema_fields:
-                meta = dict(schema_fields[key])
+            if key in schema.fields:
+                self.fields_meta[key] = schema.fields[key]
+                self.field_kinds[key] = schema.field_kinds[key]
             else:
                 meta = self._make_auto_meta(key, value)
-            self.fields_meta[key] = meta
-
-        # строим строки
-        for key in sorted(self.fields_meta.keys()):
+                self.fields_meta[key] = meta
+                self.field_kinds[key] = field_kind(meta)
+
+        keys = sorted(self.fields_meta.keys())
+        # пока форма скрыта, показ/скрытие строк не пересчитывает раскладку каждый раз
+        scroll_value = self._scroll.verticalScrollBar().value()
+        self._inner.hide()
+        for slot in self._slots:
+            self._release_editor(slot)
+        self._resize_slots(len(keys))
+
+        for key, slot in zip(keys, self._slots):
             meta = self.fields_meta[key]
-            editor_widget = self._create_field_widget(key, meta)
+            slot.key = key
+            slot.pool_key = self._pool_key(meta, self.field_kinds[key])
+            slot.holder.setMinimumHeight(self._row_heights.get(slot.pool_key, DEFAULT_ROW_HEIGHT))
+
+            label = slot.label
+            label.setText(meta.get("label", key))
+            help_text = meta.get("help")
+            label.setToolTip(help_text or "")
+            label._field_key = key      # type: ignore[attr-defined]
+            label._help_text = help_text  # type: ignore[attr-defined]
+
+        self._inner.show()
+        self._scroll.verticalScrollBar().setValue(scroll_value)
+        self._materialize_visible()
+        self._rebuild_add_combo()
+
+    @staticmethod
+    def _pool_key(meta: Dict[str, Any], field_type: str) -> PoolKey:
+        if field_type == "ref_list":
+            ref_type = meta.get("ref_type")
+            return field_type, json_type_for_ref(ref_type) if ref_type else None
+        return field_type, None
+
+    # ---------- ленивое создание редакторов ----------
+
+    def eventFilter(self, obj, event):
+        if obj is self._scroll.viewport() and event.type() == QEvent.Resize:
+            self._schedule_materialize()
+        return super().eventFilter(obj, event)
+
+    def _schedule_materialize(self, *_args: Any) -> None:
+        if not self._materialize_scheduled:
+            self._materialize_scheduled = True
+            QTimer.singleShot(0, self._materialize_visible)
+
+    def _materialize_visible(self) -> None:
+        """Создаёт (берёт из пула) редакторы для строк в видимой области и на экран вокруг неё."""
+        self._materialize_scheduled = False
+        if not self._slots or not self.isVisible():
+            return
+        top = self._scroll.verticalScrollBar().value()
+        height = self._scroll.viewport().height()
+        low, high = top - height, top + 2 * height
+        spacing = max(self.form.verticalSpacing(), 0)
+        # положение строк считаем по известным высотам, а не по geometry():
+        # раскладка формы после смены строк обновится только в цикле событий.
+        # Высота нового вида редактора узнаётся при создании — тогда пересчёт.
+        # Каждый проход создаёт хотя бы один редактор, так что цикл конечен
+        while True:
+            heights = self._row_heights
+            created = False
+            y = 0
+            for slot in self._slots:
+                bottom = y + heights.get(slot.pool_key, DEFAULT_ROW_HEIGHT)
+                if y > high:
+                    break
+                if slot.editor is None and bottom >= low:
+                    known = slot.pool_key in heights
+                    self._attach_editor(slot)
+                    created = True
+                    if not known:
+                        break
+                y = bottom + spacing
+            if not created:
+                break
+
+    def _attach_editor(self, slot: FieldSlot) -> None:
+        key = slot.key
+        meta = self.fields_meta[key]
+        field_type = self.field_kinds[key]
+
+        pool = self._editor_pool.get(slot.pool_key)
+        if pool:
+            fe = pool.pop()
+        else:
+            editor_widget = self._create_field_widget(meta, field_type)
             row_widget = ResizableRow(
                 key=key,
                 editor_widget=editor_widget,
@@ -309,20 +731,70 @@ class ObjectEditorWidget(QWidget):
                 resizable=True,
                 parent=self,
             )
+            fe = FieldEditor(slot.pool_key, row_widget, editor_widget)
+            self._watch_changes(editor_widget, row_widget)
+
+        fe.row.key = key
+        fe.row.reset_height()
+        # сигналы глушим: подстановка значения — не правка
+        fe.editor.blockSignals(True)
+        try:
+            self._set_field_value(fe.editor, key, meta, field_type, self.current_obj.data.get(key))
+        finally:
+            fe.editor.blockSignals(False)
+
+        slot.holder.layout().addWidget(fe.row)
+        fe.row.show()
+        slot.holder.setMinimumHeight(0)
+        self._row_heights[slot.pool_key] = fe.row.sizeHint().height()
+        slot.editor = fe
+        self.field_widgets[key] = fe.editor
+
+    def _watch_changes(self, w: QWidget, row: ResizableRow) -> None:
+        """Правка в редакторе помечает поле, к которому строка сейчас привязана."""
+        def mark(*_args: Any) -> None:
+            self._dirty_fields.add(row.key)
+
+        if isinstance(w, JsonFieldWidget):
+            w.edited.connect(mark)
+            w.tree_mode_toggled.connect(
+                lambda on: self._on_json_mode_toggled(row.key, w, on))
+            w.tree_edited.connect(lambda: self._on_json_tree_edited(row.key))
+        elif isinstance(w, QComboBox):
+            w.currentTextChanged.connect(mark)
+        elif isinstance(w, (QTextEdit, QLineEdit)):
+            w.textChanged.connect(mark)
+        elif isinstance(w, (QSpinBox, QDoubleSpinBox)):
+            w.valueChanged.connect(mark)
+        elif isinstance(w, QCheckBox):
+            w.toggled.connect(mark)
+        elif isinstance(w, RefListWidget):
+            w.changed.connect(mark)
+
+    def _on_json_mode_toggled(self, key: str, w: JsonFieldWidget, tree: bool) -> None:
+        if not self.current_obj:
+            return
+        # правки в тексте сначала записываем: дерево покажет уже данные объекта
+        self.apply_changes()
+        if tree:
+            self._json_tree_keys.add(key)
+        else:
+            self._json_tree_keys.discard(key)
+        w.set_value(self.current_obj.data.get(key), tree=tree)
 
-            label_text = meta.get("label", key)
-            label = ClickableLabel(label_text)
-            help_text = meta.get("help")
-            if help_text:
-                label.setToolTip(help_text)
-            label._field_key = key      # type: ignore[attr-defined]
-            label._help_text = help_text  # type: ignore[attr-defined]
-            label.clicked.connect(self._on_label_clicked)
-
-            self.form.addRow(label, row_widget)
-            self.field_widgets[key] = editor_widget
+    def _on_json_tree_edited(self, key: str) -> None:
+        if self.current_obj:
+            self.project.object_changed(self.current_obj, (key,))
 
-        self._rebuild_add_combo()
+    def _release_editor(self, slot: FieldSlot) -> None:
+        fe = slot.editor
+        if fe is None:
+            return
+        slot.holder.layout().removeWidget(fe.row)
+        fe.row.hide()
+        self._editor_pool.setdefault(fe.pool_key, []).append(fe)
+        slot.editor = None
+        self.field_widgets.pop(slot.key, None)
 
     def _rebuild_add_combo(self) -> None:
         self._clear_add_combo()
@@ -330,10 +802,9 @@ class ObjectEditorWidget(QWidget):
             self.add_combo.addItem("Создать своё поле…", "__custom__")
             return
 
-        schema_fields = self.current_schema.get("fields", {})
-        existing_keys = set(self.current_obj.data.keys())
+        existing_keys = self.current_obj.data.keys()
 
-        available = sorted(k for k in schema_fields.keys() if k not in existing_keys)
+        available = sorted(k for k in self.current_schema.fields if k not in existing_keys)
         for key in available:
             self.add_combo.addItem(key, key)
 
@@ -397,6 +868,8 @@ class ObjectEditorWidget(QWidget):
     def _on_add_field_clicked(self) -> None:
         if not self.current_obj or not self.current_schema:
             return
+        # форма перестроится — сначала запишем уже сделанные правки
+        self.apply_changes()
 
         data = self.add_combo.currentData()
         if data is None:
@@ -421,7 +894,7 @@ class ObjectEditorWidget(QWidget):
         else:
             # поле из схемы
             key = str(data)
-            schema_fields = self.current_schema.get("fields", {})
+            schema_fields = self.current_schema.fields
             if key not in schema_fields:
                 meta = {
                     "label": key,
@@ -429,7 +902,7 @@ class ObjectEditorWidget(QWidget):
                     "help": f"Поле '{key}' добавлено из схемы, но без описания.",
                 }
             else:
-                meta = dict(schema_fields[key])
+                meta = schema_fields[key]
 
         if key in self.current_obj.data:
             QMessageBox.information(self, "Поле уже есть", f"Поле '{key}' уже существует.")
@@ -438,7 +911,7 @@ class ObjectEditorWidget(QWidget):
         ftype = meta.get("type", "string")
         default_val = self._default_value_for_type(ftype)
         self.current_obj.data[key] = default_val
-        self.project.mark_dirty(self.current_obj.file_path)
+        self.project.object_changed(self.current_obj, (key,))
         self._rebuild_form()
 
     def _delete_field(self, key: str) -> None:
@@ -454,8 +927,9 @@ class ObjectEditorWidget(QWidget):
         )
         if reply != QMessageBox.Yes:
             return
+        self.apply_changes()
         del self.current_obj.data[key]
-        self.project.mark_dirty(self.current_obj.file_path)
+        self.project.object_changed(self.current_obj, (key,))
         self._rebuild_form()
 
     def _make_vertical_expanding(self, w: QWidget) -> QWidget:
@@ -466,19 +940,73 @@ class ObjectEditorWidget(QWidget):
 
     # ---------- фабрика виджетов ----------
 
-    def _create_field_widget(self, key: str, meta: Dict[str, Any]) -> QWidget:
-        field_type = meta.get("type", "string")
-        val = self.current_obj.data.get(key) if self.current_obj else None
-
+    def _create_field_widget(self, meta: Dict[str, Any], field_type: str) -> QWidget:
+        """Пустой редактор для поля; значение ставит _set_field_value."""
         # ENUM / choices → комбобокс + ручной ввод
-        choices = meta.get("choices") or meta.get("options")
-        if field_type == "enum" or choices:
+        if field_type == "enum":
             w = QComboBox(self)
             w.setEditable(True)
+            return self._make_vertical_expanding(w)
+
+        # string → QTextEdit с переносом, по умолчанию в одну строку
+        if field_type in ("string", "string_or_translation"):
+            w = QTextEdit(self)
+            w.setWordWrapMode(QTextOption.WordWrap)
+            return self._make_one_line_text(w)
+
+        # int
+        if field_type == "int":
+            w = QSpinBox(self)
+            return self._make_vertical_expanding(w)
+
+        # float
+        if field_type == "float":
+            w = QDoubleSpinBox(self)
+            w.setDecimals(4)
+            return self._make_vertical_expanding(w)
+
+        # bool
+        if field_type == "bool":
+            w = QCheckBox(self)
+            return self._make_vertical_expanding(w)
+
+        # ref_list со ссылочным типом → список с подсказками id
+        if field_type == "ref_list" and meta.get("ref_type"):
+            w = RefListWidget(self.id_models.model(json_type_for_ref(meta["ref_type"])), None, self)
+            return self._make_vertical_expanding(w)
+
+        # json → текст с фоновой проверкой
+        if field_type == "json":
+            w = JsonFieldWidget(self._json_validator, self)
+            self._make_one_line_text(w.edit)
+            return self._make_vertical_expanding(w)
 
-            if isinstance(choices, (list, tuple)):
-                for ch in choices:
-                    w.addItem(str(ch))
+        # list_string / flags / ref_list без типа → многострочный, но стартует одной строкой
+        if field_type in ("list_string", "flags", "ref_list"):
+            w = QTextEdit(self)
+            return self._make_one_line_text(w)
+
+        # запасной вариант
+        w = QLineEdit(self)
+        return self._make_vertical_expanding(w)
+
+    def _make_one_line_text(self, w: QTextEdit) -> QWidget:
+        fm = w.fontMetrics()
+        one_line = int(fm.height() * 1.6)
+        w.setMinimumHeight(one_line)
+        return self._make_vertical_expanding(w)
+
+    def _set_field_value(self, w: QWidget, key: str, meta: Dict[str, Any],
+                         field_type: str, val: Any) -> None:
+        """Показывает val в редакторе w (новом или взятом из пула)."""
+        # ENUM / choices
+        if field_type == "enum":
+            if self.current_schema and key in self.current_schema.field_choices:
+                choices = self.current_schema.field_choices[key]
+            else:
+                choices = field_choices(meta)
+            w.clear()
+            w.addItems(choices)
 
             if val is not None:
                 sval = str(val)
@@ -491,88 +1019,50 @@ class ObjectEditorWidget(QWidget):
                         w.setCurrentIndex(w.count() - 1)
                     else:
                         w.setEditText(sval)
+            return
 
-            return self._make_vertical_expanding(w)
-
-        # string → QTextEdit с переносом, по умолчанию в одну строку
+        # string
         if field_type == "string":
-            w = QTextEdit(self)
-            w.setWordWrapMode(QTextOption.WordWrap)
-            if val is not None:
-                w.setPlainText(str(val))
-            fm = w.fontMetrics()
-            one_line = int(fm.height() * 1.6)
-            w.setMinimumHeight(one_line)
-            return self._make_vertical_expanding(w)
+            w.setPlainText(str(val) if val is not None else "")
+            return
 
         # int
         if field_type == "int":
-            w = QSpinBox(self)
             w.setMinimum(meta.get("min", -1_000_000))
             w.setMaximum(meta.get("max", 1_000_000))
-            if isinstance(val, int):
-                w.setValue(val)
-            return self._make_vertical_expanding(w)
+            w.setValue(val if isinstance(val, int) else 0)
+            return
 
         # float
         if field_type == "float":
-            w = QDoubleSpinBox(self)
             w.setMinimum(meta.get("min", -1_000_000.0))
             w.setMaximum(meta.get("max", 1_000_000.0))
-            w.setDecimals(4)
-            if isinstance(val, (int, float)):
-                w.setValue(float(val))
-            return self._make_vertical_expanding(w)
+            w.setValue(float(val) if isinstance(val, (int, float)) else 0.0)
+            return
 
         # bool
         if field_type == "bool":
-            w = QCheckBox(self)
-            if isinstance(val, bool):
-                w.setChecked(val)
-            return self._make_vertical_expanding(w)
-
-        # list_string / flags → многострочный, но стартует одной строкой
-        if field_type in ("list_string", "flags"):
-            w = QTextEdit(self)
-            if isinstance(val, list):
-                w.setPlainText("\n".join(str(v) for v in val))
-            fm = w.fontMetrics()
-            one_line = int(fm.height() * 1.6)
-            w.setMinimumHeight(one_line)
-            return self._make_vertical_expanding(w)
+            w.setChecked(val if isinstance(val, bool) else False)
+            return
 
         # ref_list
-        if field_type == "ref_list":
-            ref_type = meta.get("ref_type")
-            if not ref_type:
-                w = QTextEdit(self)
-                if isinstance(val, list):
-                    w.setPlainText("\n".join(str(v) for v in val))
-                fm = w.fontMetrics()
-                one_line = int(fm.height() * 1.6)
-                w.setMinimumHeight(one_line)
-                return self._make_vertical_expanding(w)
-            initial = val if isinstance(val, list) else []
-            w = RefListWidget(self.project, ref_type, initial, self)
-            return self._make_vertical_expanding(w)
+        if isinstance(w, RefListWidget):
+            w.set_values(val if isinstance(val, list) else [])
+            return
+
+        # list_string / flags / ref_list без типа
+        if field_type in ("list_string", "flags", "ref_list"):
+            w.setPlainText("\n".join(str(v) for v in val) if isinstance(val, list) else "")
+            return
 
         # json
         if field_type == "json":
-            w = QTextEdit(self)
-            if val is not None:
-                try:
-                    w.setPlainText(json_dumps_pretty(val))
-                except Exception:
-                    w.setPlainText(str(val))
-            fm = w.fontMetrics()
-            one_line = int(fm.height() * 1.6)
-            w.setMinimumHeight(one_line)
-            return self._make_vertical_expanding(w)
+            w.set_value(val, tree=key in self._json_tree_keys)
+            return
 
-        # string_or_translation → тоже многострочный
+        # string_or_translation
         if field_type == "string_or_translation":
-            w = QTextEdit(self)
-            w.setWordWrapMode(QTextOption.WordWrap)
+            text = None
             if isinstance(val, dict):
                 text = val.get("str")
                 if text is None:
@@ -580,45 +1070,41 @@ class ObjectEditorWidget(QWidget):
                         if isinstance(v, str):
                             text = v
                             break
-                if text is not None:
-                    w.setPlainText(str(text))
             elif val is not None:
-                w.setPlainText(str(val))
-            fm = w.fontMetrics()
-            one_line = int(fm.height() * 1.6)
-            w.setMinimumHeight(one_line)
-            return self._make_vertical_expanding(w)
+                text = val
+            w.setPlainText(str(text) if text is not None else "")
+            return
 
         # запасной вариант
-        w = QLineEdit(self)
-        if val is not None:
-            w.setText(str(val))
-        return self._make_vertical_expanding(w)
+        w.setText(str(val) if val is not None else "")
 
     # ---------- запись значений ----------
 
     def apply_changes(self) -> None:
-        if not self.current_obj or not self.fields_meta:
+        """Записывает в объект поля, которые правились с момента показа (см. _dirty_fields)."""
+        if not self.current_obj or not self._dirty_fields:
             return
 
-        for key, meta in self.fields_meta.items():
+        dirty, self._dirty_fields = self._dirty_fields, set()
+        changed: List[str] = []
+        for key in dirty:
             widget = self.field_widgets.get(key)
-            if widget is None:
+            field_type = self.field_kinds.get(key)
+            if widget is None or field_type is None:
                 continue
             old_val = self.current_obj.data.get(key)
-            new_val = self._read_widget_value(key, meta, widget, old_val)
+            new_val = self._read_widget_value(key, field_type, widget, old_val)
             if new_val == old_val:
                 continue
             self.current_obj.data[key] = new_val
-            self.project.mark_dirty(self.current_obj.file_path)
+            changed.append(key)
+        if changed:
+            self.project.object_changed(self.current_obj, changed)
 
-    def _read_widget_value(self, key: str, meta: Dict[str, Any],
+    def _read_widget_value(self, key: str, field_type: str,
                            widget: QWidget, old_val: Any) -> Any:
-        field_type = meta.get("type", "string")
-        choices = meta.get("choices") or meta.get("options")
-
         # enum / choices
-        if field_type == "enum" or choices:
+        if field_type == "enum":
             if isinstance(widget, QComboBox):
                 return widget.currentText()
             return old_val
@@ -669,21 +1155,14 @@ class ObjectEditorWidget(QWidget):
                 return [line.strip() for line in text.splitlines() if line.strip()]
             return old_val
 
-        # json
+        # json: значение уже разобрано фоновой проверкой (или разбирается сейчас)
         if field_type == "json":
-            if isinstance(widget, QTextEdit):
-                text = widget.toPlainText().strip()
-                if not text:
-                    return {}
-                try:
-                    return json_load_relaxed(text)
-                except Exception as e:
-                    QMessageBox.warning(
-                        self,
-                        "Ошибка JSON",
-                        f"Поле '{key}': не удалось разобрать JSON:\n{e}",
-                    )
+            if isinstance(widget, JsonFieldWidget):
+                value, error = widget.value()
+                if error:
+                    self.message.emit(f"Поле '{key}': ошибка JSON, оставлено прежнее значение")
                     return old_val if old_val is not None else {}
+                return value
             return old_val
 
         # string_or_translation
@@ -707,18 +1186,3 @@ class ObjectEditorWidget(QWidget):
             return widget.toPlainText()
         return old_val
 
-
-# утилиты JSON
-import json
-import re
-from typing import Any
-
-
-def json_load_relaxed(text: str) -> Any:
-    text = re.sub(r"//.*", "", text)
-    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
-    return json.loads(text)
-
-
-def json_dumps_pretty(val: Any) -> str:
-    return json.dumps(val, ensure_ascii=False, indent=2)
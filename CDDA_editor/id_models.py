@@ -0,0 +1,113 @@
+# id_models.py
+"""
+Общие Qt-модели списков id для подсказок в ref_list-полях.
+
+На каждый json_type — одна модель на всё окно; все виджеты ссылок этого
+типа цепляются к ней через QCompleter, так что построение формы не зависит
+от числа id. Модели следят за реестром id проекта (IdRegistry) и
+обновляются по одному id; большие пачки (загрузка мода) применяются
+одним сбросом модели.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QStringListModel, Qt, QTimer
+from PyQt5.QtWidgets import QCompleter, QWidget
+
+from id_registry import IdRegistry
+
+# больше стольких изменений за раз — проще пересобрать модель целиком
+RESET_LIMIT = 256
+
+
+class IdListModel(QStringListModel):
+    """Отсортированные id одного json_type (строки живут на стороне Qt)."""
+
+    def __init__(self, registry: IdRegistry, json_type: str,
+                 parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.registry = registry
+        self.json_type = json_type
+        # копия строк модели — для bisect без обращений к Qt
+        self._ids: List[str] = []
+        # изменения копятся и применяются в следующей итерации цикла событий
+        self._pending: List[Tuple[str, bool]] = []
+        self._reset_pending = False
+        self._flush_scheduled = False
+        self.reset_from_registry()
+
+    def reset_from_registry(self) -> None:
+        self._ids = list(self.registry.ids(self.json_type))
+        self.setStringList(self._ids)
+
+    def id_changed(self, obj_id: str, added: bool) -> None:
+        if not self._reset_pending:
+            self._pending.append((obj_id, added))
+            if len(self._pending) > RESET_LIMIT:
+                self._reset_pending = True
+                self._pending.clear()
+        self._schedule_flush()
+
+    def schedule_reset(self) -> None:
+        self._reset_pending = True
+        self._pending.clear()
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self) -> None:
+        self._flush_scheduled = False
+        if self._reset_pending:
+            self._reset_pending = False
+            self.reset_from_registry()
+            return
+        pending, self._pending = self._pending, []
+        for obj_id, added in pending:
+            i = bisect_left(self._ids, obj_id)
+            present = i < len(self._ids) and self._ids[i] == obj_id
+            if added and not present:
+                self._ids.insert(i, obj_id)
+                self.insertRows(i, 1)
+                self.setData(self.index(i), obj_id)
+            elif not added and present:
+                del self._ids[i]
+                self.removeRows(i, 1)
+
+
+class IdModels(QObject):
+    """Модели id по json_type, создаются по первому запросу."""
+
+    def __init__(self, registry: IdRegistry, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.registry = registry
+        self._models: Dict[str, IdListModel] = {}
+        registry.add_listener(self._on_ids_changed)
+
+    def model(self, json_type: str) -> IdListModel:
+        model = self._models.get(json_type)
+        if model is None:
+            model = self._models[json_type] = IdListModel(self.registry, json_type, self)
+        return model
+
+    def _on_ids_changed(self, json_type: Optional[str], obj_id: str, added: bool) -> None:
+        if json_type is None:
+            for model in self._models.values():
+                model.schedule_reset()
+            return
+        model = self._models.get(json_type)
+        if model is not None:
+            model.id_changed(obj_id, added)
+
+
+def make_id_completer(model: IdListModel, parent: Optional[QWidget] = None) -> QCompleter:
+    """Подсказки по вхождению подстроки (и, значит, по префиксу), без учёта регистра."""
+    completer = QCompleter(model, parent)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    completer.setFilterMode(Qt.MatchContains)
+    completer.setMaxVisibleItems(15)
+    return completer
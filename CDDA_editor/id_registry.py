@@ -0,0 +1,126 @@
+# id_registry.py
+"""
+Реестр id объектов по json_type.
+
+Для каждого типа хранится отсортированный список id и число объектов
+с каждым id: у модов бывают дубликаты (override/copy-from), и удаление
+одного из них не должно убирать id из подсказок. Новые id при загрузке
+копятся отдельно и вливаются в сортированный список при первом запросе,
+так что массовая загрузка не платит за вставку каждого id по отдельности.
+
+ids() отдаёт неизменяемый снимок; пока набор id не менялся, это один и тот
+же объект, а version() позволяет виджетам понять, что пора обновиться.
+Кому нужно знать о каждом изменении (модели подсказок в GUI), подписываются
+через add_listener.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+# слушатель: (json_type, id, добавлен ли); json_type None — реестр очищен
+IdListener = Callable[[Optional[str], str, bool], None]
+
+# добавлений меньше этого вливаем вставками, больше — досортировкой
+_INSORT_LIMIT = 64
+
+
+class _TypeIds:
+    __slots__ = ("counts", "sorted", "pending", "version", "snapshot", "snapshot_version")
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+        self.sorted: List[str] = []
+        # новые id, ещё не влитые в sorted
+        self.pending: List[str] = []
+        self.version = 0
+        self.snapshot: Tuple[str, ...] = ()
+        self.snapshot_version = 0
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        if len(self.pending) <= _INSORT_LIMIT:
+            for obj_id in self.pending:
+                insort(self.sorted, obj_id)
+        else:
+            # timsort склеивает два отсортированных куска почти линейно
+            self.pending.sort()
+            self.sorted.extend(self.pending)
+            self.sorted.sort()
+        self.pending.clear()
+
+
+class IdRegistry:
+    """json_type → {id: число объектов} плюс отсортированные снимки id."""
+
+    def __init__(self) -> None:
+        self._types: Dict[str, _TypeIds] = {}
+        self._listeners: List[IdListener] = []
+
+    def add_listener(self, listener: IdListener) -> None:
+        """listener вызывается, когда id появляется в типе или пропадает из него."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: IdListener) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self, json_type: Optional[str], obj_id: str, added: bool) -> None:
+        for listener in self._listeners:
+            listener(json_type, obj_id, added)
+
+    def clear(self) -> None:
+        self._types.clear()
+        self._notify(None, "", False)
+
+    def add(self, json_type: str, obj_id: str) -> None:
+        t = self._types.get(json_type)
+        if t is None:
+            t = self._types[json_type] = _TypeIds()
+        count = t.counts.get(obj_id, 0)
+        t.counts[obj_id] = count + 1
+        if count == 0:
+            t.pending.append(obj_id)
+            t.version += 1
+            if self._listeners:
+                self._notify(json_type, obj_id, True)
+
+    def remove(self, json_type: str, obj_id: str) -> None:
+        """Убирает одно вхождение id; из списка id пропадает вместе с последним объектом."""
+        t = self._types.get(json_type)
+        if t is None:
+            return
+        count = t.counts.get(obj_id, 0)
+        if count > 1:
+            t.counts[obj_id] = count - 1
+            return
+        if count == 0:
+            return
+        del t.counts[obj_id]
+        t.flush()
+        i = bisect_left(t.sorted, obj_id)
+        del t.sorted[i]
+        t.version += 1
+        if self._listeners:
+            self._notify(json_type, obj_id, False)
+
+    def count(self, json_type: str, obj_id: str) -> int:
+        """Сколько объектов типа json_type носят этот id."""
+        t = self._types.get(json_type)
+        return t.counts.get(obj_id, 0) if t is not None else 0
+
+    def version(self, json_type: str) -> int:
+        """Растёт при каждом изменении набора id этого типа."""
+        t = self._types.get(json_type)
+        return t.version if t is not None else 0
+
+    def ids(self, json_type: str) -> Tuple[str, ...]:
+        """Отсортированные id типа; один и тот же кортеж, пока ничего не менялось."""
+        t = self._types.get(json_type)
+        if t is None:
+            return ()
+        if t.snapshot_version != t.version:
+            t.flush()
+            t.snapshot = tuple(t.sorted)
+            t.snapshot_version = t.version
+        return t.snapshot
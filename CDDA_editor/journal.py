@@ -0,0 +1,122 @@
+# journal.py
+"""
+Журнал несохранённых правок: после сбоя редактора они не теряются.
+
+Каждая правка проекта дописывается в файл рядом с модом строкой JSON.
+Строка сразу отдаётся ОС (flush), так что падение самого редактора её
+не теряет, а fsync делается пачками: раз в FSYNC_BATCH записей или не
+реже FSYNC_INTERVAL секунд (и по sync()), чтобы печать не ждала диска.
+После сохранения журнал пересобирается: в нём остаётся только то, что
+ещё не записано в файлы. При следующем открытии мода ModProject
+проигрывает его поверх загружаемых файлов (см. ModProject.add_parsed_file).
+
+Записи (поле "op"), "file" — путь файла мода относительно корня:
+    file  — size и mtime файла на диске, на который ложатся следующие
+            записи о нём (None — файла нет); если файл с тех пор поменяли,
+            эти записи при восстановлении пропускаются;
+    set   — полю key элемента номер at задано value;
+    del   — поле key элемента at удалено;
+    obj   — data элемента at целиком (value);
+    new   — в конец файла добавлен новый объект категории schema;
+    drop  — элемент at удалён из файла.
+В записях об элементе at есть и "id" — id объекта до правки: если при
+восстановлении на этом месте другой объект, записи о файле пропускаются.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from saving import write_atomic
+
+JOURNAL_NAME = ".cdda_editor_journal.jsonl"
+
+# fsync после стольких записей или через столько секунд после прошлого
+FSYNC_BATCH = 64
+FSYNC_INTERVAL = 1.0
+
+JournalRecord = Dict[str, Any]
+
+
+def journal_path(target: Path) -> Path:
+    """Журнал папки мода — в ней самой; журнал отдельного файла — рядом с ним."""
+    if target.is_dir():
+        return target / JOURNAL_NAME
+    return target.with_name(f".{target.name}{JOURNAL_NAME}")
+
+
+def _encode(record: JournalRecord) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class EditJournal:
+    """Файл журнала: дописывание, чтение и пересборка."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def append(self, record: JournalRecord) -> None:
+        """Дописывает запись; значения сериализуются сразу, так что их можно менять дальше."""
+        if self._file is None:
+            self._file = self.path.open("a", encoding="utf-8", newline="\n")
+        self._file.write(_encode(record))
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_BATCH or time.monotonic() - self._synced_at >= FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def read(self) -> List[JournalRecord]:
+        """Записи по порядку; оборванный хвост (сбой посреди записи) отбрасывается."""
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not isinstance(record, dict):
+                break
+            records.append(record)
+        return records
+
+    def rewrite(self, records: List[JournalRecord]) -> None:
+        """Заменяет журнал этими записями (атомарно); пустой журнал удаляется."""
+        self.close()
+        if not records:
+            self.discard()
+            return
+        write_atomic(self.path, "".join(map(_encode, records)).encode("utf-8"))
+
+    def discard(self) -> None:
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
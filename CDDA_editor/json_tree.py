@@ -0,0 +1,151 @@
+# json_tree.py
+"""
+Древовидное представление вложенного JSON-значения (dict/list).
+
+Модель смотрит прямо в данные объекта: узлы детей создаются, только когда
+Qt спрашивает про этот уровень, текст строится только для видимых значений,
+а правка скаляра сразу записывается в исходный dict/list.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional
+
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+
+
+class JsonNode:
+    """Ссылка на значение: container[key]. У корня container нет."""
+
+    __slots__ = ("parent", "container", "key", "row", "children")
+
+    def __init__(self, parent: Optional[JsonNode], container: Any, key: Any, row: int) -> None:
+        self.parent = parent
+        self.container = container
+        self.key = key
+        self.row = row
+        # None — этот уровень ещё не разворачивали
+        self.children: Optional[List[JsonNode]] = None
+
+
+def _summary(value: Any) -> str:
+    if isinstance(value, dict):
+        return f"{{…}}  {len(value)} ключ(ей)"
+    return f"[…]  {len(value)} элемент(ов)"
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """Ключ | значение; скалярные значения редактируются на месте."""
+
+    # пользователь поменял значение в данных
+    value_edited = pyqtSignal()
+
+    HEADERS = ("Ключ", "Значение")
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._root_value: Any = None
+        self._root = JsonNode(None, None, None, 0)
+
+    def set_root(self, value: Any) -> None:
+        self.beginResetModel()
+        self._root_value = value
+        self._root = JsonNode(None, None, None, 0)
+        self.endResetModel()
+
+    def root_value(self) -> Any:
+        return self._root_value
+
+    # ---------- узлы ----------
+
+    def _value(self, node: JsonNode) -> Any:
+        if node.container is None:
+            return self._root_value
+        return node.container[node.key]
+
+    def _children(self, node: JsonNode) -> List[JsonNode]:
+        if node.children is None:
+            value = self._value(node)
+            if isinstance(value, dict):
+                node.children = [JsonNode(node, value, k, i) for i, k in enumerate(value)]
+            elif isinstance(value, list):
+                node.children = [JsonNode(node, value, i, i) for i in range(len(value))]
+            else:
+                node.children = []
+        return node.children
+
+    def _node(self, index: QModelIndex) -> JsonNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    # ---------- QAbstractItemModel ----------
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._children(self._node(parent))[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        value = self._value(self._node(parent))
+        # детей не создаём: длины контейнера достаточно
+        return len(value) if isinstance(value, (dict, list)) else 0
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return self.rowCount(parent) > 0
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole):
+            return None
+        node = index.internalPointer()
+        if index.column() == 0:
+            return f"[{node.key}]" if isinstance(node.key, int) else str(node.key)
+        value = self._value(node)
+        if isinstance(value, (dict, list)):
+            return None if role == Qt.EditRole else _summary(value)
+        return json.dumps(value, ensure_ascii=False)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 1 and not isinstance(self._value(index.internalPointer()), (dict, list)):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index: QModelIndex, text: Any, role: int = Qt.EditRole) -> bool:
+        if role != Qt.EditRole or index.column() != 1:
+            return False
+        node = index.internalPointer()
+        old = self._value(node)
+        if isinstance(old, (dict, list)):
+            return False
+        # JSON-литерал (число, true, null, "строка"); всё остальное — как строка
+        try:
+            new = json.loads(text)
+        except ValueError:
+            new = str(text)
+        if isinstance(new, (dict, list)):
+            return False
+        if new == old and type(new) is type(old):
+            return False
+        node.container[node.key] = new
+        self.dataChanged.emit(index, index)
+        self.value_edited.emit()
+        return True
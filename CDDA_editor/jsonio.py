@@ -0,0 +1,267 @@
+# jsonio.py
+"""
+Общие утилиты чтения/записи JSON.
+
+Файлы модов CDDA иногда содержат комментарии // и /* ... */, поэтому
+читаем их "расслабленно". Комментарии вырезаются одним проходом, который
+знает про строковые литералы: "//" и URL внутри строк не трогаются.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+JsonSource = Union[str, bytes, bytearray, memoryview]
+
+
+_ESCAPE_RE = re.compile(r"\\.", re.S)
+_NOT_NEWLINE_RE = re.compile(r"[^\n]")
+
+_ESCAPE_RE_B = re.compile(rb"\\.", re.S)
+_NOT_NEWLINE_RE_B = re.compile(rb"[^\n]")
+
+# быстрый путь json_load_relaxed (см. там), строки внутри не различает
+_LINE_COMMENT_RE = re.compile(r"//[^\n]*")
+
+
+def strip_json_comments(text: JsonSource) -> JsonSource:
+    """
+    Заменяет комментарии пробелами (переводы строк сохраняются).
+
+    Один линейный проход: идём от одного "//" или "/*" к следующему и по
+    числу неэкранированных кавычек между ними понимаем, внутри строки мы
+    или нет. Смещения символов не меняются, так что строка/столбец в
+    ошибках json указывают на исходный текст. Если комментариев нет,
+    возвращается тот же объект без копирования; байты с комментариями
+    возвращаются как bytearray (комментарии затираются в нём на месте).
+    """
+    if isinstance(text, memoryview):
+        text = text.tobytes()
+    is_str = isinstance(text, str)
+    if is_str:
+        escape_re, blank_re = _ESCAPE_RE, _NOT_NEWLINE_RE
+        quote, backslash, esc_quote, slash, newline, block_end = '"', "\\", '\\"', "/", "\n", "*/"
+        space, slash_item, star_item = " ", "/", "*"
+    else:
+        escape_re, blank_re = _ESCAPE_RE_B, _NOT_NEWLINE_RE_B
+        quote, backslash, esc_quote, slash, newline, block_end = b'"', b"\\", b'\\"', b"/", b"\n", b"*/"
+        # элемент bytes — число
+        space, slash_item, star_item = b" ", ord("/"), ord("*")
+    find = text.find
+    count = text.count
+
+    # str: куски текста между комментариями; байты: копия, которую затираем
+    parts: List[str] = []
+    buf: Optional[bytearray] = None
+    n = len(text)
+    copied = 0      # до этого места str уже перенесён в parts
+    scan = 0        # до этого места известно, внутри строки мы или нет
+    pos = 0         # отсюда ищем следующий "/"
+    in_string = False
+    # первая обратная косая не раньше scan: пока она дальше, экранированных кавычек нет
+    next_escape = -1
+    while True:
+        i = find(slash, pos)
+        if i < 0 or i + 1 >= n:
+            break
+        pos = i + 1
+        if text[i + 1] != slash_item and text[i + 1] != star_item:
+            continue
+        quotes = count(quote, scan, i)
+        if next_escape < scan:
+            next_escape = find(backslash, scan)
+            if next_escape < 0:
+                next_escape = n
+        if quotes and next_escape < i:
+            quotes -= escape_re.findall(text, scan, i).count(esc_quote)
+        if quotes & 1:
+            in_string = not in_string
+        scan = i + 1
+        if in_string:
+            continue
+
+        if text[i + 1] == slash_item:
+            end = find(newline, i)
+            end = n if end < 0 else end
+            blank = space * (end - i)
+        else:
+            end = find(block_end, i + 2)
+            end = n if end < 0 else end + 2
+            if find(newline, i, end) < 0:
+                blank = space * (end - i)
+            else:
+                blank = blank_re.sub(space, text[i:end])
+        if is_str:
+            parts.append(text[copied:i])
+            parts.append(blank)
+        else:
+            if buf is None:
+                buf = bytearray(text)
+            buf[i:end] = blank
+        copied = scan = pos = end
+
+    if buf is not None:
+        return buf
+    if not parts:
+        return text
+    parts.append(text[copied:])
+    return "".join(parts)
+
+
+# ---------- интернирование строк ----------
+#
+# В данных CDDA одни и те же ключи ("type", "id", "flags"...) и короткие
+# значения-перечисления ("MONSTER", "c_red", имена флагов) повторяются
+# миллионы раз. json держит по отдельной строке на каждое вхождение
+# (ключи он склеивает только в пределах одного файла), поэтому при загрузке
+# прогоняем ключи и короткие строки через общую таблицу sys.intern.
+# marshal сохраняет признак интернированности, так что строки остаются
+# общими и после передачи из процесса-воркера и после дискового кэша.
+
+# длиннее — это уже описания и прочий текст, повторяются редко
+INTERN_MAX_LEN = 40
+
+
+def _intern_list(values: List[Any]) -> None:
+    intern = sys.intern
+    for i, v in enumerate(values):
+        if type(v) is str:
+            if len(v) <= INTERN_MAX_LEN:
+                values[i] = intern(v)
+        elif type(v) is list:
+            _intern_list(v)
+
+
+def intern_pairs(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """object_pairs_hook для json: интернирует ключи и короткие строковые значения."""
+    intern = sys.intern
+    obj = {}
+    for k, v in pairs:
+        if type(v) is str:
+            if len(v) <= INTERN_MAX_LEN:
+                v = intern(v)
+        elif type(v) is list:
+            # словари внутри списка уже прошли через этот же хук
+            _intern_list(v)
+        obj[intern(k)] = v
+    return obj
+
+
+def _decode_source(text: JsonSource) -> str:
+    """
+    Байты → str так же, как это сделал бы json.loads (кодировку он
+    определяет по началу текста). Декодируем сами и один раз: json.loads
+    на байтах сначала декодирует их целиком, и после неудачной попытки
+    из-за комментария пришлось бы декодировать ещё раз.
+    """
+    if isinstance(text, str):
+        return text
+    if isinstance(text, memoryview):
+        # если memoryview смотрит на весь буфер, декодируем сам буфер без копии
+        base = text.obj
+        if text.contiguous and isinstance(base, (bytes, bytearray)) and text.nbytes == len(base):
+            text = base
+        else:
+            text = text.tobytes()
+    return text.decode(json.detect_encoding(text), "surrogatepass")
+
+
+def json_load_relaxed(text: JsonSource, intern_strings: bool = False) -> Any:
+    """
+    json.loads, который терпит комментарии // и /* ... */.
+
+    Принимает str или байты (bytes/bytearray/memoryview, кодировку json
+    определит сам). Текст без комментариев разбирается сразу, без
+    предварительного прохода и копий. intern_strings — интернировать
+    ключи и короткие значения (см. intern_pairs).
+    """
+    text = _decode_source(text)
+    hook = intern_pairs if intern_strings else None
+    try:
+        return json.loads(text, object_pairs_hook=hook)
+    except ValueError as e:
+        first_error = e
+    if "*" not in text:
+        # Блочных комментариев нет — строчные вырезаем одним re.sub, без
+        # цикла на каждый комментарий. Строки json не переносятся, поэтому
+        # если "//" стояло внутри строки, вместе с ним уйдёт её закрывающая
+        # кавычка и json.loads упадёт на переводе строки; тогда — точный путь.
+        try:
+            return json.loads(_LINE_COMMENT_RE.sub("", text), object_pairs_hook=hook)
+        except ValueError:
+            pass
+    stripped = strip_json_comments(text)
+    if stripped is text:
+        raise first_error
+    return json.loads(stripped, object_pairs_hook=hook)
+
+
+# ---------- разбор верхнего уровня по элементам ----------
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_INTERN_DECODER = json.JSONDecoder(object_pairs_hook=intern_pairs)
+_PLAIN_DECODER = json.JSONDecoder()
+
+# (начало, конец, значение) одного элемента верхнего уровня
+TopLevelItem = Tuple[int, int, Any]
+
+
+def split_top_level(text: str, intern_strings: bool = True) -> Optional[List[TopLevelItem]]:
+    """
+    Разбирает файл по элементам верхнего уровня и запоминает их смещения.
+
+    Для файла-массива — по элементу на каждый объект массива, для
+    файла-объекта — один элемент на весь объект, для остального — None.
+    Комментарии допускаются; смещения всегда указывают в исходный text,
+    так что text[start:end] — ровно исходный текст элемента.
+    Без intern_strings разбор в разы быстрее (см. intern_pairs).
+    """
+    decoder = _INTERN_DECODER if intern_strings else _PLAIN_DECODER
+    try:
+        return _split_top_level(text, decoder)
+    except ValueError as first_error:
+        stripped = strip_json_comments(text)
+        if stripped is text:
+            raise first_error
+    return _split_top_level(stripped, decoder)
+
+
+def _split_top_level(text: str, decoder: json.JSONDecoder) -> Optional[List[TopLevelItem]]:
+    decode = decoder.raw_decode
+    ws = _WS_RE.match
+    n = len(text)
+    idx = ws(text, 0).end()
+
+    if text.startswith("[", idx):
+        items: List[TopLevelItem] = []
+        idx = ws(text, idx + 1).end()
+        if text.startswith("]", idx):
+            idx = ws(text, idx + 1).end()
+        else:
+            while True:
+                value, end = decode(text, idx)
+                items.append((idx, end, value))
+                idx = ws(text, end).end()
+                if text.startswith(",", idx):
+                    idx = ws(text, idx + 1).end()
+                    continue
+                if text.startswith("]", idx):
+                    idx = ws(text, idx + 1).end()
+                    break
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+        if idx != n:
+            raise json.JSONDecodeError("Extra data", text, idx)
+        return items
+
+    value, end = decode(text, idx)
+    if ws(text, end).end() != n:
+        raise json.JSONDecodeError("Extra data", text, end)
+    if isinstance(value, dict):
+        return [(idx, end, value)]
+    return None
+
+
+def json_dumps_pretty(val: Any) -> str:
+    return json.dumps(val, ensure_ascii=False, indent=2)
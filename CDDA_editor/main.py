@@ -1,5 +1,6 @@
 # main.py
 from __future__ import annotations
+import time
 from typing import Optional, List
 
 from pathlib import Path
@@ -10,16 +11,27 @@ from PyQt5.QtWidgets import (
     QAction,
     QFileDialog,
     QMessageBox,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QSplitter,
+    QProgressBar,
+    QPushButton,
+    QDockWidget,
+    QListWidget,
+    QListWidgetItem,
+    QAbstractItemView,
+    QLineEdit,
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QCheckBox,
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QModelIndex, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QPalette, QColor
 
-from project import ModProject, ModObject
-from editor import ObjectEditorWidget, json_dumps_pretty
-from schemas import SCHEMAS
+from project import ModProject, ModObject, iter_parsed_files
+from parse_cache import ParseCache, default_cache_dir
+from editor import ObjectEditorWidget
+from object_tree import ObjectTreeModel
 
 
 # --------- ТЁМНАЯ/СВЕТЛАЯ ТЕМЫ --------- #
@@ -69,15 +81,84 @@ def set_light_palette(app: QApplication, original: Optional[QPalette] = None) ->
     app.setStyleSheet("")
 
 
+# --------- ФОНОВАЯ ЗАГРУЗКА --------- #
+
+class ProjectLoadThread(QThread):
+    """
+    Разбирает файлы мода в фоне и отдаёт их пачками.
+
+    Сам проект не трогает: результаты вливает GUI-поток через
+    ModProject.add_parsed_file, так что дерево растёт по мере загрузки.
+    """
+
+    # список (path, ParsedFile)
+    batch_ready = pyqtSignal(list)
+    # (сколько файлов разобрано, сколько всего)
+    progress = pyqtSignal(int, int)
+
+    # как часто отдавать пачку в GUI, сек
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, paths: List[Path], workers: Optional[int],
+                 cache: Optional[ParseCache] = None, lazy: bool = False,
+                 parent=None) -> None:
+        super().__init__(parent)
+        self.paths = paths
+        self.workers = workers
+        self.cache = cache
+        self.lazy = lazy
+
+    def run(self) -> None:
+        total = len(self.paths)
+        batch: list = []
+        done = 0
+        last_emit = time.monotonic()
+        parsed_iter = iter_parsed_files(self.paths, self.workers, self.cache, self.lazy)
+        try:
+            for item in parsed_iter:
+                if self.isInterruptionRequested():
+                    break
+                batch.append(item)
+                done += 1
+                now = time.monotonic()
+                if now - last_emit >= self.BATCH_INTERVAL:
+                    self.batch_ready.emit(batch)
+                    self.progress.emit(done, total)
+                    batch = []
+                    last_emit = now
+        finally:
+            parsed_iter.close()
+        if batch:
+            self.batch_ready.emit(batch)
+        self.progress.emit(done, total)
+
+
+def _shorten(text: str, limit: int = 80) -> str:
+    """Однострочный кусок длинного значения для списка результатов."""
+    text = text.replace("\n", " ")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
 # --------- ГЛАВНОЕ ОКНО --------- #
 
 class MainWindow(QMainWindow):
+    # сколько объектов показывать по фильтру
+    FILTER_LIMIT = 1000
+    # сколько объектов показывать в поиске по тексту
+    TEXT_SEARCH_LIMIT = 500
+    # сколько объектов за раз разносить по индексам поиска, пока GUI простаивает
+    NAME_INDEX_STEP = 2000
+    TEXT_INDEX_STEP = 1000
+    # как часто досбрасывать журнал правок на диск, мс
+    JOURNAL_SYNC_MS = 2000
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("CDDA 0.G JSON редактор модов")
         self.resize(1300, 800)
 
-        self.project = ModProject()
+        self.project = ModProject(cache=ParseCache(default_cache_dir()))
+        self._lazy_load: bool = self.project.lazy
 
         app = QApplication.instance()
         self._original_palette: Optional[QPalette] = app.palette() if app else None
@@ -85,20 +166,99 @@ class MainWindow(QMainWindow):
         if app:
             set_dark_palette(app)
 
-        self.tree = QTreeWidget(self)
-        self.tree.setHeaderLabel("Объекты")
-        self.tree.currentItemChanged.connect(self._on_tree_selection_changed)
+        self.tree_model = ObjectTreeModel(self)
+        self.tree = QTreeView(self)
+        self.tree.setModel(self.tree_model)
+        # строки плоские (категории — строки-заголовки); все одной высоты,
+        # так что вид не меряет каждую из сотен тысяч
+        self.tree.setRootIsDecorated(False)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # двойной щелчок по заголовку сворачивает/разворачивает категорию
+        self.tree.doubleClicked.connect(self._on_tree_double_clicked)
+        # после пересборки строк модели возвращаем выделение на открытый объект
+        self.tree_model.modelReset.connect(self._restore_tree_current)
+        # можно выделить несколько объектов и удалить их разом
+        self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tree.selectionModel().currentChanged.connect(self._on_tree_selection_changed)
 
         self.editor = ObjectEditorWidget(self.project, self)
+        self.editor.message.connect(lambda text: self.statusBar().showMessage(text, 8000))
+
+        # фильтр над деревом: нечёткий поиск по id и имени
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setPlaceholderText("Фильтр: id или имя…")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self._apply_filter)
+        self._filtered = False
+        self._indexing_scheduled = False
+
+        tree_panel = QWidget(self)
+        tree_layout = QVBoxLayout(tree_panel)
+        tree_layout.setContentsMargins(0, 0, 0, 0)
+        tree_layout.addWidget(self.filter_edit)
+        tree_layout.addWidget(self.tree)
 
         splitter = QSplitter(self)
-        splitter.addWidget(self.tree)
+        splitter.addWidget(tree_panel)
         splitter.addWidget(self.editor)
         splitter.setStretchFactor(1, 1)
         self.setCentralWidget(splitter)
 
+        # панель "Использования": кто ссылается на выбранный объект
+        self.usages_list = QListWidget(self)
+        self.usages_list.itemDoubleClicked.connect(self._on_usage_activated)
+        self.usages_dock = QDockWidget("Использования", self)
+        self.usages_dock.setObjectName("usages_dock")
+        self.usages_dock.setWidget(self.usages_list)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.usages_dock)
+
+        # панель "Поиск по тексту": где в data объектов встречается строка
+        self.text_search_edit = QLineEdit(self)
+        self.text_search_edit.setPlaceholderText("Значение или ключ, Enter — искать")
+        self.text_search_edit.setClearButtonEnabled(True)
+        self.text_search_edit.returnPressed.connect(self._search_text)
+        self.text_search_exact = QCheckBox("Целиком", self)
+        self.text_search_exact.setToolTip("Строка равна запросу (с учётом регистра), а не содержит его")
+        self.text_search_exact.toggled.connect(lambda _: self._search_text())
+        self.text_results = QListWidget(self)
+        self.text_results.itemDoubleClicked.connect(self._on_usage_activated)
+
+        search_row = QHBoxLayout()
+        search_row.addWidget(self.text_search_edit)
+        search_row.addWidget(self.text_search_exact)
+        search_panel = QWidget(self)
+        search_layout = QVBoxLayout(search_panel)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        search_layout.addLayout(search_row)
+        search_layout.addWidget(self.text_results)
+        self.text_search_dock = QDockWidget("Поиск по тексту", self)
+        self.text_search_dock.setObjectName("text_search_dock")
+        self.text_search_dock.setWidget(search_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.text_search_dock)
+
         self._create_actions()
 
+        # фоновая загрузка папки
+        self._loader: Optional[ProjectLoadThread] = None
+        self._loading_path: str = ""
+
+        self.load_progress = QProgressBar(self)
+        self.load_progress.setMaximumWidth(250)
+        self.load_progress.setFormat("%v / %m файлов")
+        self.load_cancel_btn = QPushButton("Отмена", self)
+        self.load_cancel_btn.clicked.connect(self._cancel_loading)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel_btn)
+        self.load_progress.hide()
+        self.load_cancel_btn.hide()
+
+        # журнал сам делает fsync пачками; таймер досбрасывает последнюю
+        self._journal_timer = QTimer(self)
+        self._journal_timer.setInterval(self.JOURNAL_SYNC_MS)
+        self._journal_timer.timeout.connect(self.project.sync_journal)
+        self._journal_timer.start()
+
     def _create_actions(self) -> None:
         open_dir_act = QAction("Открыть папку мода", self)
         open_dir_act.triggered.connect(self._open_mod_folder)
@@ -115,6 +275,16 @@ class MainWindow(QMainWindow):
         save_current_act = QAction("Сохранить файл текущего объекта", self)
         save_current_act.triggered.connect(self._save_current_file)
 
+        lazy_load_act = QAction("Ленивая загрузка (большие моды)", self)
+        lazy_load_act.setCheckable(True)
+        lazy_load_act.setChecked(self.project.lazy)
+        lazy_load_act.setToolTip(
+            "При открытии только индексировать объекты, а разбирать каждый при выборе. "
+            "Действует со следующей загрузки."
+        )
+        lazy_load_act.triggered.connect(self._toggle_lazy_load)
+        self._lazy_load_act = lazy_load_act
+
         dark_theme_act = QAction("Темная тема", self)
         dark_theme_act.setCheckable(True)
         dark_theme_act.setChecked(True)
@@ -136,9 +306,13 @@ class MainWindow(QMainWindow):
         file_menu.addAction(save_all_act)
         file_menu.addAction(save_dirty_act)
         file_menu.addAction(save_current_act)
+        file_menu.addSeparator()
+        file_menu.addAction(lazy_load_act)
 
         view_menu = menubar.addMenu("Вид")
         view_menu.addAction(dark_theme_act)
+        view_menu.addAction(self.usages_dock.toggleViewAction())
+        view_menu.addAction(self.text_search_dock.toggleViewAction())
 
         object_menu = menubar.addMenu("Объект")
         object_menu.addAction(add_obj_act)
@@ -172,13 +346,19 @@ class MainWindow(QMainWindow):
 
     # ---------- загрузка ----------
 
+    def _toggle_lazy_load(self, checked: bool) -> None:
+        # режим влияет на то, что вернут воркеры, поэтому меняем его только между загрузками
+        self._lazy_load = checked
+
     def _warn_discard_changes(self) -> bool:
+        # правки из полей редактора тоже считаются: иначе их не видно в dirty_files
+        self.editor.apply_changes()
         if not self.project.dirty_files:
             return True
         reply = QMessageBox.question(
             self,
             "Есть несохранённые изменения",
-            "Есть изменённые файлы. Загрузить другой мод/файл?\n"
+            f"Изменённых файлов: {len(self.project.dirty_files)}. Загрузить другой мод/файл?\n"
             "Несохранённые изменения будут потеряны.",
             QMessageBox.Yes | QMessageBox.No,
         )
@@ -191,13 +371,93 @@ class MainWindow(QMainWindow):
         path = QFileDialog.getExistingDirectory(self, "Выберите папку мода")
         if not path:
             return
+        # правки этого мода пользователь отбросил — восстанавливать их незачем
+        self.project.discard_journal()
+        self._stop_loading()
+        self.editor.set_object(None)
+        self.project.lazy = self._lazy_load
         try:
-            self.project.load_from_dir(path)
+            paths = self.project.begin_load_dir(path)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить мод:\n{e}")
             return
         self._rebuild_tree()
-        self.statusBar().showMessage(f"Загружен мод из {path}", 5000)
+
+        self._loading_path = path
+        self.load_progress.setRange(0, len(paths))
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.load_cancel_btn.show()
+        self.statusBar().showMessage(f"Загрузка мода из {path}…")
+
+        loader = ProjectLoadThread(paths, self.project.load_workers, self.project.cache,
+                                   self.project.lazy, self)
+        loader.batch_ready.connect(self._on_files_loaded)
+        loader.progress.connect(self._on_load_progress)
+        loader.finished.connect(self._on_loading_finished)
+        self._loader = loader
+        loader.start()
+
+    def _on_files_loaded(self, batch: list) -> None:
+        if self.sender() is not self._loader:
+            return   # пачка от уже отменённой загрузки
+        added: List[ModObject] = []
+        for path, parsed in batch:
+            added.extend(self.project.add_parsed_file(path, parsed))
+        if self._filtered:
+            self._apply_filter()
+        else:
+            self._append_objects_to_tree(added)
+        self._schedule_indexing()
+
+    def _on_load_progress(self, done: int, total: int) -> None:
+        if self.sender() is self._loader:
+            self.load_progress.setValue(done)
+
+    def _on_loading_finished(self) -> None:
+        loader = self.sender()
+        if loader is not self._loader:
+            return
+        self._loader = None
+        self.load_progress.hide()
+        self.load_cancel_btn.hide()
+        interrupted = loader.isInterruptionRequested()
+        self.project.finish_load(complete=not interrupted)
+        if interrupted:
+            self.statusBar().showMessage(
+                f"Загрузка прервана, открыто {len(self.project.files)} файлов из {self._loading_path}", 5000
+            )
+        else:
+            self.statusBar().showMessage(
+                f"Загружен мод из {self._loading_path}{self._restored_note()}", 5000)
+        loader.deleteLater()
+
+    def _restored_note(self) -> str:
+        restored = self.project.restored_edits
+        return f"; восстановлено несохранённых правок: {restored}" if restored else ""
+
+    def _cancel_loading(self) -> None:
+        if self._loader is not None:
+            self._loader.requestInterruption()
+
+    def _stop_loading(self) -> None:
+        """Останавливает фоновую загрузку и дожидается потока."""
+        loader = self._loader
+        if loader is None:
+            return
+        self._loader = None
+        loader.requestInterruption()
+        loader.wait()
+        self.load_progress.hide()
+        self.load_cancel_btn.hide()
+
+    def closeEvent(self, event) -> None:
+        self._stop_loading()
+        # недописанные в объект правки из полей — в журнал: при следующем открытии они вернутся
+        self.editor.apply_changes()
+        self.project.close_journal()
+        self.editor.shutdown()
+        super().closeEvent(event)
 
     def _open_mod_file(self) -> None:
         if not self._warn_discard_changes():
@@ -211,73 +471,148 @@ class MainWindow(QMainWindow):
         )
         if not path:
             return
+        self.project.discard_journal()
+        self._stop_loading()
+        self.project.lazy = self._lazy_load
         try:
             self.project.load_from_file(path)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить файл:\n{e}")
             return
         self._rebuild_tree()
-        self.statusBar().showMessage(f"Загружен файл {path}", 5000)
+        self.statusBar().showMessage(f"Загружен файл {path}{self._restored_note()}", 5000)
 
     # ---------- дерево ----------
 
     def _rebuild_tree(self) -> None:
-        self.tree.clear()
-
-        for schema_key, schema in SCHEMAS.items():
-            objs = self.project.objects_by_schema.get(schema_key)
-            if not objs:
-                continue
-            root = QTreeWidgetItem([schema.get("label", schema_key)])
-            # в корне теперь храним schema_key, чтобы знать категорию
-            root.setData(0, Qt.UserRole, schema_key)
-            self.tree.addTopLevelItem(root)
-            for obj in objs:
-                item = QTreeWidgetItem([obj.label()])
-                item.setData(0, Qt.UserRole, obj)
-                root.addChild(item)
-            root.setExpanded(True)
-
-    def _on_tree_selection_changed(
-        self,
-        current: Optional[QTreeWidgetItem],
-        _prev: Optional[QTreeWidgetItem],
-    ) -> None:
-        if current is None:
-            self.editor.set_object(None)
+        if self.filter_edit.text().strip():
+            self._apply_filter()
+        else:
+            self.tree_model.reset_from_project(self.project)
+        self._schedule_indexing()
+
+    def _apply_filter(self) -> None:
+        query = self.filter_edit.text().strip()
+        if not query:
+            if self._filtered:
+                self._filtered = False
+                self.tree_model.reset_from_project(self.project)
+                self.statusBar().clearMessage()
+            return
+        found = self.project.find_objects(query, self.FILTER_LIMIT)
+        self._filtered = True
+        self.tree_model.set_objects(found)
+        if len(found) >= self.FILTER_LIMIT:
+            self.statusBar().showMessage(f"Фильтр: показаны первые {len(found)} объектов")
+        else:
+            self.statusBar().showMessage(f"Фильтр: найдено объектов: {len(found)}")
+
+    def _schedule_indexing(self) -> None:
+        """Достраивает индексы поиска кусками, пока GUI простаивает (поиск достроит остаток сам)."""
+        project = self.project
+        if self._indexing_scheduled:
+            return
+        if project.name_index.pending() or project.text_index.pending():
+            self._indexing_scheduled = True
+            QTimer.singleShot(0, self._build_index_step)
+
+    def _build_index_step(self) -> None:
+        self._indexing_scheduled = False
+        # сначала индекс фильтра: он дешевле, а нужен чаще
+        if self.project.name_index.pending():
+            self.project.name_index.flush(self.NAME_INDEX_STEP)
+        else:
+            self.project.text_index.flush(self.TEXT_INDEX_STEP)
+        self._schedule_indexing()
+
+    def _remove_objects_from_tree(self, objs: List[ModObject]) -> None:
+        """Убирает строки объектов из модели дерева, остальное дерево не трогается."""
+        self.tree_model.remove_objects(objs)
+
+    def _append_objects_to_tree(self, objs: List[ModObject]) -> None:
+        """Дописывает объекты в конец своих категорий, не трогая остальное дерево."""
+        self.tree_model.append_objects(objs)
+
+    def _on_tree_selection_changed(self, current: QModelIndex, prev: QModelIndex) -> None:
+        obj = self.tree_model.object_at(current)
+        if obj is not None and obj is self.editor.current_obj:
+            return   # та же строка после пересборки модели — форму не трогаем
+        self.editor.set_object(obj)
+
+        # set_object записал правки прошлого объекта — обновим его подпись
+        prev_obj = self.tree_model.object_at(prev)
+        if prev_obj is not None:
+            self.tree_model.refresh(prev_obj)
+
+        self._refresh_usages()
+
+    def _restore_tree_current(self) -> None:
+        obj = self.editor.current_obj
+        if obj is not None:
+            index = self.tree_model.index_of(obj)
+            if index.isValid():
+                self.tree.setCurrentIndex(index)
+
+    def _on_tree_double_clicked(self, index: QModelIndex) -> None:
+        schema_key = self.tree_model.category_at(index)
+        if schema_key is not None:
+            self.tree_model.set_collapsed(schema_key, not self.tree_model.is_collapsed(schema_key))
+
+    # ---------- использования ----------
+
+    def _refresh_usages(self) -> None:
+        self.usages_list.clear()
+        obj = self.editor.current_obj
+        if obj is None:
+            return
+        referrers = self.project.referrers_of(obj)
+        for src, fields in sorted(referrers.items(), key=lambda kv: kv[0].label()):
+            item = QListWidgetItem(f"{src.label()} — {', '.join(fields)} ({src.file_path.name})")
+            item.setData(Qt.UserRole, src)
+            self.usages_list.addItem(item)
+
+    # ---------- поиск по тексту ----------
+
+    def _search_text(self) -> None:
+        self.text_results.clear()
+        query = self.text_search_edit.text()
+        if not query.strip():
             return
-        data = current.data(0, Qt.UserRole)
-        if isinstance(data, ModObject):
-            self.editor.set_object(data)
+        hits = self.project.find_text(query, self.TEXT_SEARCH_LIMIT, self.text_search_exact.isChecked())
+        objs = set()
+        for obj, path, value in hits:
+            objs.add(obj)
+            where = f"{path} (ключ)" if value is None else f"{path}: {_shorten(value)}"
+            item = QListWidgetItem(f"{obj.label()} — {where} ({obj.file_path.name})")
+            item.setData(Qt.UserRole, obj)
+            self.text_results.addItem(item)
+        if len(objs) >= self.TEXT_SEARCH_LIMIT:
+            self.statusBar().showMessage(f"Поиск по тексту: показаны первые {len(objs)} объектов", 5000)
         else:
-            self.editor.set_object(None)
+            self.statusBar().showMessage(
+                f"Поиск по тексту: вхождений {len(hits)} в {len(objs)} объектах", 5000
+            )
+
+    def _on_usage_activated(self, item: QListWidgetItem) -> None:
+        src = item.data(Qt.UserRole)
+        if isinstance(src, ModObject):
+            self._select_object_in_tree(src)
 
     def _current_schema_key(self) -> Optional[str]:
         """
         Понять, в какой категории мы сейчас: по выбранному объекту или корневому узлу.
         """
-        item = self.tree.currentItem()
-        if not item:
-            return None
-        data = item.data(0, Qt.UserRole)
-        if isinstance(data, ModObject):
-            return data.schema_key
-        if isinstance(data, str):
-            return data
-        return None
+        return self.tree_model.schema_key_at(self.tree.currentIndex())
 
     def _select_object_in_tree(self, target: ModObject) -> None:
         """
-        Находит в дереве item, который хранит этот ModObject, и выделяет его.
+        Находит в дереве строку этого ModObject и выделяет её.
         """
-        for i in range(self.tree.topLevelItemCount()):
-            root = self.tree.topLevelItem(i)
-            for j in range(root.childCount()):
-                item = root.child(j)
-                obj = item.data(0, Qt.UserRole)
-                if obj is target:
-                    self.tree.setCurrentItem(item)
-                    return
+        self.tree_model.set_collapsed(target.schema_key, False)
+        index = self.tree_model.index_of(target)
+        if index.isValid():
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
 
     # ---------- создание / удаление объектов ----------
 
@@ -296,7 +631,7 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Ошибка", f"Не удалось создать объект:\n{e}")
             return
 
-        self._rebuild_tree()
+        self._append_objects_to_tree([new_obj])
         self._select_object_in_tree(new_obj)
         self.editor.set_object(new_obj)
         self.statusBar().showMessage(
@@ -304,118 +639,86 @@ class MainWindow(QMainWindow):
         )
 
     def _delete_object(self) -> None:
-        item = self.tree.currentItem()
-        if not item:
-            QMessageBox.information(self, "Удаление объекта", "Сначала выбери объект в списке.")
-            return
-        data = item.data(0, Qt.UserRole)
-        if not isinstance(data, ModObject):
-            QMessageBox.information(self, "Удаление объекта", "Нужно выбрать конкретный объект, а не категорию.")
+        objs = [self.tree_model.object_at(index) for index in self.tree.selectionModel().selectedRows()]
+        objs = [obj for obj in objs if obj is not None]
+        if not objs:
+            QMessageBox.information(
+                self,
+                "Удаление объекта",
+                "Сначала выбери в списке объект (или несколько), а не категорию.",
+            )
             return
 
-        obj: ModObject = data
+        if len(objs) == 1:
+            question = f"Удалить объект {objs[0].label()} из файла {objs[0].file_path.name}?"
+        else:
+            files = {obj.file_path for obj in objs}
+            question = f"Удалить {len(objs)} объектов из {len(files)} файлов?"
         reply = QMessageBox.question(
             self,
             "Подтверждение удаления",
-            f"Удалить объект {obj.label()} из файла {obj.file_path.name}?",
+            question,
             QMessageBox.Yes | QMessageBox.No,
         )
         if reply != QMessageBox.Yes:
             return
 
-        self.project.delete_object(obj)
+        # сначала отпускаем объект из редактора, чтобы его правки не легли после удаления
+        self.tree.setCurrentIndex(QModelIndex())
         self.editor.set_object(None)
-        self._rebuild_tree()
-        self.statusBar().showMessage("Объект удалён", 5000)
+        removed = self.project.delete_objects(objs)
+        self._remove_objects_from_tree(removed)
+        self._refresh_usages()
+        self.statusBar().showMessage(
+            "Объект удалён" if len(removed) == 1 else f"Удалено объектов: {len(removed)}", 5000
+        )
 
     # ---------- сохранение ----------
 
-    def _write_file(self, path: Path) -> Optional[str]:
-        objs = self.project.files.get(path)
-        if objs is None:
-            return f"{path}: файл не найден в проекте"
-        try:
-            with path.open("w", encoding="utf-8") as f:
-                f.write(json_dumps_pretty(objs))
-                f.write("\n")
-            return None
-        except Exception as e:
-            return f"{path}: {e}"
-
-    def _save_all(self) -> None:
-        self.editor.apply_changes()
-
-        errors: List[str] = []
-        written: set[Path] = set()
-        for path in self.project.files.keys():
-            err = self._write_file(path)
-            if err:
-                errors.append(err)
-            else:
-                written.add(path)
-
-        self.project.dirty_files -= written
-
-        if errors:
+    def _save_paths(self, paths: List[Path]) -> None:
+        report = self.project.save_files(paths)
+        # итог — одной строкой состояния; окно только если что-то не записалось
+        self.statusBar().showMessage(f"Сохранение: {report.summary()}", 8000)
+        if report.errors:
             QMessageBox.critical(
                 self,
                 "Ошибки при сохранении",
-                "Не удалось сохранить некоторые файлы:\n\n" + "\n".join(errors),
+                f"{report.summary()}.\n\nНе удалось сохранить:\n\n"
+                + "\n".join(f"{path}: {err}" for path, err in report.errors),
             )
-        else:
-            QMessageBox.information(self, "Готово", "Все файлы сохранены.")
+
+    def _save_all(self) -> None:
+        self.editor.apply_changes()
+        self._save_paths(list(self.project.files.keys()))
 
     def _save_dirty(self) -> None:
         self.editor.apply_changes()
 
         if not self.project.dirty_files:
-            QMessageBox.information(self, "Сохранение", "Нет изменённых файлов.")
+            self.statusBar().showMessage("Сохранение: нет изменённых файлов", 5000)
             return
-
-        errors: List[str] = []
-        written: set[Path] = set()
-        for path in sorted(self.project.dirty_files):
-            err = self._write_file(path)
-            if err:
-                errors.append(err)
-            else:
-                written.add(path)
-
-        self.project.dirty_files -= written
-
-        if errors:
-            QMessageBox.critical(
-                self,
-                "Ошибки при сохранении",
-                "Не удалось сохранить некоторые файлы:\n\n" + "\n".join(errors),
-            )
-        else:
-            QMessageBox.information(self, "Готово", "Все изменённые файлы сохранены.")
+        self._save_paths(sorted(self.project.dirty_files))
 
     def _save_current_file(self) -> None:
         self.editor.apply_changes()
 
-        item = self.tree.currentItem()
-        if not item:
+        index = self.tree.currentIndex()
+        if not index.isValid():
             QMessageBox.information(self, "Сохранение", "Не выбран объект.")
             return
-        obj = item.data(0, Qt.UserRole)
-        if not isinstance(obj, ModObject):
+        obj = self.tree_model.object_at(index)
+        if obj is None:
             QMessageBox.information(self, "Сохранение", "Нужно выбрать конкретный объект, а не категорию.")
             return
-
-        path = obj.file_path
-        err = self._write_file(path)
-        if err:
-            QMessageBox.critical(self, "Ошибка сохранения", err)
-        else:
-            if path in self.project.dirty_files:
-                self.project.dirty_files.remove(path)
-            QMessageBox.information(self, "Готово", f"Файл {path} сохранён.")
+        self._save_paths([obj.file_path])
 
 
 def main() -> None:
     import sys
+    import multiprocessing
+
+    # загрузка мода идёт пулом процессов; нужно для собранного exe
+    multiprocessing.freeze_support()
 
     app = QApplication(sys.argv)
     w = MainWindow()
@@ -0,0 +1,260 @@
+# name_index.py
+"""
+Нечёткий поиск объектов по id и отображаемому имени.
+
+Для каждого объекта хранится строка поиска (id и имя в нижнем регистре),
+а для каждой триграммы — список объектов, в строке которых она встречается.
+Запрос сначала ищется как подстрока: кандидаты — пересечение списков
+триграмм каждого слова, так что проверять приходится немногих. Если точных
+совпадений мало, добираем похожие: объекты, в которых есть хотя бы
+половина триграмм запроса (опечатки, пропущенные буквы).
+
+Разбор на триграммы — самое дорогое, поэтому при загрузке объекты только
+записываются в очередь, а списки достраиваются кусками через flush()
+(GUI зовёт его в простое) и в любом случае до первого поиска.
+
+Списки, а не множества: так индекс в несколько раз меньше. Удалённые и
+переименованные объекты из списков не вычищаются — кандидат всё равно
+проверяется по своей текущей строке; когда таких записей набирается
+половина, индекс перестраивается заново через ту же очередь.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Collection, Dict, List, Optional, Set
+
+# доля триграмм запроса, которая должна найтись в похожем объекте
+FUZZY_RATIO = 0.5
+# сколько лучших кандидатов в похожие проверять по строке
+FUZZY_CANDIDATES = 2000
+# точных кандидатов больше этого не пересекаем и не сортируем, а берём первые подходящие
+RANK_LIMIT = 5000
+
+
+def search_text(obj_id: str, name: str) -> str:
+    # перевод строки не даёт триграммам склеить конец id с началом имени
+    return f"{obj_id}\n{name}".lower() if name != obj_id else obj_id.lower()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _intersect(postings: List[Collection[Any]]) -> Collection[Any]:
+    """Пересечение; если даже самый короткий список велик, отдаём его как
+    есть — кандидаты всё равно проверяются по строке, а пересекать списки
+    по сотне тысяч объектов дороже, чем проверить первые limit."""
+    postings = sorted(postings, key=len)
+    if len(postings[0]) > RANK_LIMIT:
+        return postings[0]
+    found = set(postings[0])
+    for keys in postings[1:]:
+        if len(keys) > 8 * len(found):
+            break   # дальше дешевле проверить оставшихся по строке
+        found.intersection_update(keys)
+    return found
+
+
+class NameIndex:
+    """объект → строка поиска, триграмма → объекты. Объекты сравниваются по идентичности."""
+
+    def __init__(self) -> None:
+        self._texts: Dict[Any, str] = {}
+        self._postings: Dict[str, List[Any]] = {}
+        # строки короче триграммы: их не найти через _postings
+        self._short: Set[Any] = set()
+        # объекты, чьи триграммы ещё не разнесены по _postings (dict — упорядоченное множество)
+        self._pending: Dict[Any, None] = {}
+        # записей в _postings всего и из них устаревших
+        self._entries = 0
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def clear(self) -> None:
+        self._texts.clear()
+        self._postings.clear()
+        self._short.clear()
+        self._pending.clear()
+        self._entries = 0
+        self._stale = 0
+
+    def add(self, key: Any, text: str) -> None:
+        self._texts[key] = text
+        self._pending[key] = None
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self, limit: Optional[int] = None) -> bool:
+        """Разносит по индексу до limit объектов из очереди (None — все). True — очередь не пуста."""
+        pending = self._pending
+        if limit is None or limit >= len(pending):
+            keys = list(pending)
+            pending.clear()
+        else:
+            keys = []
+            for key in pending:
+                keys.append(key)
+                if len(keys) >= limit:
+                    break
+            for key in keys:
+                del pending[key]
+        texts = self._texts
+        postings = self._postings
+        for key in keys:
+            text = texts[key]
+            if len(text) < 3:
+                self._short.add(key)
+                continue
+            grams = _trigrams(text)
+            self._entries += len(grams)
+            for gram in grams:
+                found = postings.get(gram)
+                if found is None:
+                    postings[gram] = [key]
+                else:
+                    found.append(key)
+        return bool(pending)
+
+    def remove(self, key: Any) -> None:
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        if key in self._pending:
+            del self._pending[key]   # ещё не разнесён по спискам
+            return
+        self._short.discard(key)
+        self._outdate(len(_trigrams(text)))
+
+    def update(self, key: Any, text: str) -> None:
+        """Меняет строку поиска объекта; дописываются только новые триграммы."""
+        old = self._texts.get(key)
+        if old == text:
+            return
+        self._texts[key] = text
+        if old is None or key in self._pending:
+            # триграммы ещё не разнесены — разнесём уже новые
+            self._pending[key] = None
+            return
+        old_grams = _trigrams(old)
+        added = _trigrams(text) - old_grams
+        for gram in added:
+            self._postings.setdefault(gram, []).append(key)
+        self._entries += len(added)
+        if len(text) < 3:
+            self._short.add(key)
+        else:
+            self._short.discard(key)
+        self._outdate(len(old_grams - _trigrams(text)))
+
+    def _outdate(self, count: int) -> None:
+        self._stale += count
+        if self._stale * 2 > self._entries:
+            # устаревших записей половина — перестраиваем всё заново
+            self._postings.clear()
+            self._short.clear()
+            self._entries = 0
+            self._stale = 0
+            self._pending = dict.fromkeys(self._texts)
+
+    # ---------- поиск ----------
+
+    def _word_candidates(self, word: str) -> Optional[Collection[Any]]:
+        """Объекты, в строке которых может быть word; None — слишком много, проще перебрать."""
+        if len(word) >= 3:
+            postings = [self._postings.get(gram) for gram in _trigrams(word)]
+            if any(keys is None for keys in postings):
+                return ()
+            return _intersect(postings)
+        # короткое слово: объединяем триграммы, в которые оно входит
+        parts = [keys for gram, keys in self._postings.items() if word in gram]
+        if sum(map(len, parts)) > RANK_LIMIT:
+            return None
+        found = set().union(*parts)
+        found.update(key for key in self._short if word in self._texts[key])
+        return found
+
+    def search(self, query: str, limit: int) -> List[Any]:
+        """
+        До limit объектов: сначала содержащие все слова запроса (точное
+        совпадение id, затем начало строки, затем короткие строки вперёд),
+        потом похожие — по числу совпавших триграмм.
+        """
+        words = query.lower().split()
+        if not words or limit <= 0:
+            return []
+        self.flush()
+        texts = self._texts
+
+        # точные: все слова есть в текущей строке объекта
+        postings = []
+        for word in words:
+            keys = self._word_candidates(word)
+            if keys is not None:
+                postings.append(keys)
+        candidates = _intersect(postings) if postings else texts.keys()
+        if len(candidates) > RANK_LIMIT:
+            # запрос слишком общий: ранжировать нечего, отдаём первые подходящие
+            found = []
+            seen = set()
+            for key in candidates:
+                text = texts.get(key)
+                if text is not None and key not in seen and all(word in text for word in words):
+                    seen.add(key)
+                    found.append(key)
+                    if len(found) >= limit:
+                        break
+            return found
+        found = []
+        for key in set(candidates):
+            text = texts.get(key)
+            if text is not None and all(word in text for word in words):
+                found.append(key)
+        first = words[0]
+        found.sort(key=lambda key: (
+            texts[key].split("\n", 1)[0] != first,
+            not texts[key].startswith(first),
+            len(texts[key]),
+        ))
+        if len(found) >= limit:
+            return found[:limit]
+
+        # похожие: считаем, в скольких списках триграмм запроса встречается объект.
+        # Списки длиннее RANK_LIMIT (триграммы вроде "ion") пропускаем — они
+        # ничего не различают, — а лучших кандидатов проверяем по их строке
+        grams: Set[str] = set()
+        for word in words:
+            grams |= _trigrams(word)
+        if len(grams) < 2:
+            return found
+        need = max(1, int(len(grams) * FUZZY_RATIO + 0.5))
+        counts: Counter = Counter()
+        skipped = 0
+        for gram in grams:
+            keys = self._postings.get(gram, ())
+            if len(keys) <= RANK_LIMIT:
+                counts.update(keys)
+            else:
+                skipped += 1
+        # пропущенные триграммы могли добавить не больше skipped совпадений
+        fuzzy = [key for key, hits in counts.items() if hits + skipped >= need]
+        if len(fuzzy) > FUZZY_CANDIDATES:
+            fuzzy.sort(key=counts.__getitem__, reverse=True)
+            del fuzzy[FUZZY_CANDIDATES:]
+        exact = set(found)
+        scored = []
+        for key in fuzzy:
+            if key in exact:
+                continue
+            text = texts.get(key)
+            if text is None:
+                continue
+            # совпадения считаем по текущей строке: в списках бывают устаревшие записи
+            hits = len(grams & _trigrams(text))
+            if hits >= need:
+                scored.append((-hits, len(text), key))
+        scored.sort(key=lambda item: item[:2])
+        found.extend(key for _, _, key in scored[:limit - len(found)])
+        return found
@@ -0,0 +1,293 @@
+# object_tree.py
+"""
+Модель панели объектов: заголовок категории (схемы), за ним её объекты.
+
+Строки плоские: QTreeView после каждой вставки/удаления заново раскладывает
+все строки раскрытых узлов и спрашивает модель про каждую, а у модели на
+Python это сотни миллисекунд на 100k объектов. Поэтому тексты строк лежат
+на стороне Qt (QStringListModel), Python-код зовётся только для видимых
+строк, а вставка, удаление и переименование правят строки по месту.
+
+Номер строки объекта внутри категории ищется по словарю; после удаления
+словарь не переписывается целиком, а считается устаревшим начиная с первой
+удалённой строки и дочинивается при первом обращении.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from PyQt5.QtCore import QModelIndex, QStringListModel, Qt
+from PyQt5.QtGui import QFont
+
+from project import ModObject, ModProject
+from schemas import COMPILED_SCHEMAS
+
+# больше стольких разрозненных кусков удаляем пересборкой модели
+RESET_LIMIT = 64
+# QStringListModel вставляет строки по одной, каждый раз сдвигая хвост списка;
+# если сдвигов выходит больше стольких на строку модели, дешевле пересобрать всё
+SHIFTS_PER_RESET_ROW = 4000
+
+
+class ObjectTreeModel(QStringListModel):
+    """
+    Qt.UserRole отдаёт schema_key для заголовка категории и ModObject
+    для объекта. Свёрнутая категория показывает только заголовок.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        # непустые категории в порядке схем и их объекты
+        self._keys: List[str] = []
+        self._rows: Dict[str, List[ModObject]] = {}
+        self._collapsed: Set[str] = set()
+        # строка заголовка каждой категории; None — пересчитать
+        self._starts: Optional[List[int]] = None
+        # объект → номер внутри категории; верен для номеров меньше _valid_upto[категория]
+        self._row_of: Dict[ModObject, int] = {}
+        self._valid_upto: Dict[str, int] = {}
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    # ---------- наполнение ----------
+
+    def reset_from_project(self, project: ModProject) -> None:
+        self._set_rows({key: list(objs) for key, objs in project.objects_by_schema.items() if objs})
+
+    def set_objects(self, objs: Iterable[ModObject]) -> None:
+        """Показывает только эти объекты (результат фильтра) в их порядке внутри категорий."""
+        rows: Dict[str, List[ModObject]] = {}
+        for obj in objs:
+            rows.setdefault(obj.schema_key, []).append(obj)
+        self._set_rows(rows)
+
+    def _set_rows(self, rows: Dict[str, List[ModObject]]) -> None:
+        self._keys = [key for key in COMPILED_SCHEMAS if key in rows]
+        self._rows = rows
+        self._collapsed.clear()
+        self._row_of.clear()
+        self._valid_upto = {key: 0 for key in self._keys}
+        self._reset()
+
+    def _reset(self) -> None:
+        """Пересобирает все строки из _keys/_rows."""
+        strings: List[str] = []
+        for key in self._keys:
+            strings.append(self._header_text(key))
+            if key not in self._collapsed:
+                strings.extend(obj.label() for obj in self._rows[key])
+        self._starts = None
+        self.setStringList(strings)
+
+    def _header_text(self, schema_key: str) -> str:
+        mark = "▸" if schema_key in self._collapsed else "▾"
+        return f"{mark} {COMPILED_SCHEMAS[schema_key].label} ({len(self._rows[schema_key])})"
+
+    def _update_header(self, schema_key: str) -> None:
+        self.setData(self.index(self._start(schema_key)), self._header_text(schema_key))
+
+    def _insert_labels(self, row: int, objs: List[ModObject]) -> None:
+        """Вставляет строки объектов; _keys/_rows к этому времени уже обновлены."""
+        if not objs:
+            return
+        total = self.rowCount()
+        if len(objs) * (total - row + len(objs)) > SHIFTS_PER_RESET_ROW * (total + len(objs)):
+            self._reset()
+            return
+        self.insertRows(row, len(objs))
+        # вид узнаёт о новых текстах одним dataChanged, а не по сигналу на строку
+        self.blockSignals(True)
+        try:
+            for i, obj in enumerate(objs):
+                self.setData(self.index(row + i), obj.label())
+        finally:
+            self.blockSignals(False)
+        self.dataChanged.emit(self.index(row), self.index(row + len(objs) - 1))
+
+    def append_objects(self, objs: Iterable[ModObject]) -> None:
+        """Дописывает объекты в конец их категорий."""
+        by_schema: Dict[str, List[ModObject]] = {}
+        for obj in objs:
+            by_schema.setdefault(obj.schema_key, []).append(obj)
+        for schema_key, group in by_schema.items():
+            rows = self._rows.get(schema_key)
+            if rows is None:
+                # новая категория: встаёт на место по порядку схем
+                position = COMPILED_SCHEMAS[schema_key].position
+                at = sum(1 for key in self._keys if COMPILED_SCHEMAS[key].position < position)
+                row = self._start(self._keys[at]) if at < len(self._keys) else self.rowCount()
+                self._keys.insert(at, schema_key)
+                self._rows[schema_key] = group
+                self._valid_upto[schema_key] = 0
+                self._starts = None
+                self.insertRows(row, 1)
+                self.setData(self.index(row), self._header_text(schema_key))
+                self._insert_labels(row + 1, group)
+                continue
+            row = self._start(schema_key) + 1 + len(rows)
+            rows.extend(group)
+            self._starts = None
+            if schema_key not in self._collapsed:
+                self._insert_labels(row, group)
+            self._update_header(schema_key)
+
+    def remove_objects(self, objs: Iterable[ModObject]) -> None:
+        """Убирает объекты; опустевшие категории пропадают."""
+        by_schema: Dict[str, List[int]] = {}
+        for obj in objs:
+            row = self.row_of(obj)
+            if row is not None:
+                by_schema.setdefault(obj.schema_key, []).append(row)
+        if not by_schema:
+            return
+
+        # номера идут подряд кусками; удаляем куски с конца, чтобы номера не съезжали
+        spans: Dict[str, List[List[int]]] = {}
+        for schema_key, rows in by_schema.items():
+            rows.sort()
+            groups: List[List[int]] = []
+            for row in rows:
+                if groups and groups[-1][1] == row - 1:
+                    groups[-1][1] = row
+                else:
+                    groups.append([row, row])
+            spans[schema_key] = groups
+        reset = sum(len(g) for g in spans.values()) > RESET_LIMIT
+
+        for schema_key, groups in spans.items():
+            rows = self._rows[schema_key]
+            start = self._start(schema_key) + 1
+            visible = not reset and schema_key not in self._collapsed
+            for first, last in reversed(groups):
+                for obj in rows[first:last + 1]:
+                    self._row_of.pop(obj, None)
+                del rows[first:last + 1]
+                if visible:
+                    self.removeRows(start + first, last - first + 1)
+            self._valid_upto[schema_key] = min(self._valid_upto[schema_key], groups[0][0])
+            if reset:
+                continue
+            if rows:
+                self._update_header(schema_key)
+            else:
+                # пустые категории не показываем
+                self.removeRows(start - 1, 1)
+                self._drop_category(schema_key)
+            self._starts = None
+
+        if reset:
+            for schema_key in spans:
+                if not self._rows[schema_key]:
+                    self._drop_category(schema_key)
+            self._reset()
+
+    def _drop_category(self, schema_key: str) -> None:
+        self._keys.remove(schema_key)
+        del self._rows[schema_key]
+        del self._valid_upto[schema_key]
+        self._collapsed.discard(schema_key)
+
+    def refresh(self, obj: ModObject) -> None:
+        """Подпись объекта могла поменяться."""
+        index = self.index_of(obj)
+        if index.isValid():
+            self.setData(index, obj.label())
+
+    # ---------- сворачивание ----------
+
+    def is_collapsed(self, schema_key: str) -> bool:
+        return schema_key in self._collapsed
+
+    def set_collapsed(self, schema_key: str, collapsed: bool) -> None:
+        rows = self._rows.get(schema_key)
+        if rows is None or (schema_key in self._collapsed) == collapsed:
+            return
+        start = self._start(schema_key) + 1
+        if collapsed:
+            self._collapsed.add(schema_key)
+            self.removeRows(start, len(rows))
+        else:
+            self._collapsed.discard(schema_key)
+            self._insert_labels(start, rows)
+        self._starts = None
+        self._update_header(schema_key)
+
+    # ---------- поиск ----------
+
+    def _start(self, schema_key: str) -> int:
+        """Строка заголовка категории."""
+        return self._ensure_starts()[self._keys.index(schema_key)]
+
+    def _ensure_starts(self) -> List[int]:
+        if self._starts is None:
+            starts = []
+            row = 0
+            for key in self._keys:
+                starts.append(row)
+                row += 1 if key in self._collapsed else 1 + len(self._rows[key])
+            self._starts = starts
+        return self._starts
+
+    def row_of(self, obj: ModObject) -> Optional[int]:
+        """Номер объекта внутри его категории."""
+        rows = self._rows.get(obj.schema_key)
+        if rows is None:
+            return None
+        row = self._row_of.get(obj)
+        if row is not None and row < len(rows) and rows[row] is obj:
+            return row
+        # запись устарела (или её нет): дочиниваем словарь с первой неверной строки
+        start = self._valid_upto[obj.schema_key]
+        row_of = self._row_of
+        for i in range(start, len(rows)):
+            row_of[rows[i]] = i
+        self._valid_upto[obj.schema_key] = len(rows)
+        row = row_of.get(obj)
+        return row if row is not None and rows[row] is obj else None
+
+    def index_of(self, obj: ModObject) -> QModelIndex:
+        """Индекс строки объекта; невалидный, если объекта нет или категория свёрнута."""
+        row = self.row_of(obj)
+        if row is None or obj.schema_key in self._collapsed:
+            return QModelIndex()
+        return self.index(self._start(obj.schema_key) + 1 + row)
+
+    def _locate(self, index: QModelIndex) -> Any:
+        if not index.isValid():
+            return None
+        starts = self._ensure_starts()
+        at = bisect_right(starts, index.row()) - 1
+        if at < 0:
+            return None
+        key = self._keys[at]
+        offset = index.row() - starts[at]
+        return key if offset == 0 else self._rows[key][offset - 1]
+
+    def object_at(self, index: QModelIndex) -> Optional[ModObject]:
+        found = self._locate(index)
+        return found if isinstance(found, ModObject) else None
+
+    def schema_key_at(self, index: QModelIndex) -> Optional[str]:
+        """Категория строки: своя у заголовка, категория объекта у объекта."""
+        found = self._locate(index)
+        return found.schema_key if isinstance(found, ModObject) else found
+
+    def category_at(self, index: QModelIndex) -> Optional[str]:
+        """schema_key, если это строка заголовка категории."""
+        found = self._locate(index)
+        return found if isinstance(found, str) else None
+
+    # ---------- QStringListModel ----------
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return "Объекты"
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.UserRole:
+            return self._locate(index)
+        if role == Qt.FontRole:
+            return self._bold if self.category_at(index) is not None else None
+        return super().data(index, role)
@@ -0,0 +1,152 @@
+# parse_cache.py
+"""
+Дисковый кэш разобранных JSON-файлов.
+
+Для каждого файла мода хранится уже разобранный список объектов вместе
+с раскладкой по схемам (то, что возвращает project.parse_json_file).
+Запись годна, пока у файла те же путь, размер и mtime (и, если включено,
+тот же хэш содержимого). Формат — marshal: компактно и грузится быстрее,
+чем json.loads исходного текста.
+"""
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from schemas import COMPILED_SCHEMAS, ID_FALLBACK_KEYS
+
+# меняем, если поменялся формат записи или логика разбора файлов
+CACHE_FORMAT_VERSION = 5
+
+# запись: <длина заголовка><заголовок marshal><значение marshal>
+_HEADER_LEN = struct.Struct("<I")
+
+# по умолчанию кэш не больше 512 МБ
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """Папка кэша в стандартном для ОС месте."""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(base) / "CDDA_json_editor" / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "cdda_json_editor"
+
+
+def content_hash(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _schemas_fingerprint() -> str:
+    # раскладка по схемам зависит от json_type схем и их порядка (при
+    # совпадении json_type выигрывает первая), а индекс ленивой загрузки
+    # хранит ещё id, имя и ссылки объектов — они берутся из полей схем
+    parts = [
+        (key, schema.json_type, schema.id_field, schema.display_field, sorted(schema.ref_fields.items()))
+        for key, schema in COMPILED_SCHEMAS.items()
+    ]
+    parts.append(ID_FALLBACK_KEYS)
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ParseCache:
+    """
+    Кэш в папке cache_dir: по одному файлу <hash пути>.bin на JSON-файл.
+
+    Объект должен пиклиться — его передают в процессы-воркеры загрузки,
+    и там он сам читает и пишет записи (запись атомарная через rename).
+    """
+
+    def __init__(self, cache_dir: Path,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 verify_hash: bool = False) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        # проверять ли ещё и хэш содержимого (файл придётся прочитать, но не разбирать)
+        self.verify_hash = verify_hash
+        self.fingerprint = _schemas_fingerprint()
+
+    def _entry_path(self, path: Path, kind: str) -> Path:
+        key = hashlib.blake2b(f"{kind}:{path.resolve()}".encode("utf-8"), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.bin"
+
+    def _header(self, path: Path, st: os.stat_result, kind: str) -> Tuple[Any, ...]:
+        return (CACHE_FORMAT_VERSION, self.fingerprint, kind, str(path.resolve()), st.st_size, st.st_mtime_ns)
+
+    def get(self, path: Path, st: os.stat_result, kind: str = "objects") -> Optional[Any]:
+        """
+        Возвращает сохранённое значение или None, если записи нет или она устарела.
+
+        kind различает виды записей для одного файла (разобранные объекты,
+        индекс для ленивой загрузки).
+        """
+        entry = self._entry_path(path, kind)
+        try:
+            with entry.open("rb") as f:
+                blob = f.read()
+            (header_len,) = _HEADER_LEN.unpack_from(blob)
+            body = memoryview(blob)[_HEADER_LEN.size:]
+            header = marshal.loads(body[:header_len])
+            if header[:6] != self._header(path, st, kind):
+                return None
+            if self.verify_hash:
+                with path.open("rb") as src:
+                    if content_hash(src.read()) != header[6]:
+                        return None
+            value = marshal.loads(body[header_len:])
+            # отметка для вытеснения давно не использованных записей
+            os.utime(entry)
+        except (OSError, EOFError, ValueError, TypeError, IndexError, struct.error):
+            return None
+        return value
+
+    def put(self, path: Path, st: os.stat_result, raw: bytes, value: Any,
+            kind: str = "objects") -> None:
+        """Сохраняет value для файла path (raw — его содержимое, нужно для хэша)."""
+        header = self._header(path, st, kind) + (content_hash(raw),)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                header_blob = marshal.dumps(header)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_HEADER_LEN.pack(len(header_blob)))
+                    f.write(header_blob)
+                    f.write(marshal.dumps(value))
+                os.replace(tmp, self._entry_path(path, kind))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (OSError, ValueError):
+            # кэш — не критичная вещь: не смогли записать, ну и ладно
+            pass
+
+    def evict(self) -> None:
+        """Удаляет самые старые записи, пока кэш не влезет в max_bytes."""
+        try:
+            entries = []
+            for entry in self.cache_dir.glob("*.bin"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda e: e[0])
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+
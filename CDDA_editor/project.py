@@ -1,77 +1,451 @@
 # project.py
 from __future__ import annotations
+import marshal
+import multiprocessing
+import os
+from operator import is_not
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Iterator, Tuple, Union
 
-from schemas import SCHEMAS
+from schemas import COMPILED_SCHEMAS, ID_FALLBACK_KEYS, schema_key_for_type
+from jsonio import json_load_relaxed, split_top_level
+from parse_cache import ParseCache
+from references import ObjectRefs, ReferenceIndex, object_refs
+from id_registry import IdRegistry
+from name_index import NameIndex, search_text
+from text_index import TextHit, TextIndex
+from saving import FileToSave, SaveReport, save_files
+from cdda_format import format_element
+from journal import EditJournal, JournalRecord, journal_path
 
 
-@dataclass
+# результат разбора файла: (объекты, schema_key для каждого объекта, ошибка)
+ParsedFile = Tuple[Optional[List[Any]], List[Optional[str]], Optional[str]]
+
+# элемент индекса для ленивой загрузки: (начало, конец, schema_key, id, имя, ссылки)
+IndexEntry = Tuple[int, int, Optional[str], str, str, ObjectRefs]
+# результат индексации файла: (текст файла, индекс, ошибка)
+IndexedFile = Tuple[Optional[str], List[IndexEntry], Optional[str]]
+
+# меньше файлов нет смысла раздавать по процессам: запуск пула дороже
+PARALLEL_MIN_FILES = 32
+
+# каким файл лежит на диске после загрузки или сохранения:
+# (размер, mtime_ns, его элементы по порядку)
+FileOrigin = Tuple[int, int, Tuple[Any, ...]]
+
+
+def content_hash(text: str) -> int:
+    """
+    Хэш содержимого элемента по его тексту из cdda_format.format_element:
+    значения, которые запишутся одинаково (1 и 1.0), неотличимы, а порядок
+    ключей и true против 1 — различаются.
+    """
+    return hash(text)
+
+
+class LazyEntry:
+    """
+    Ещё не разобранный объект верхнего уровня: кусок текста файла.
+
+    Хранится в ModProject.files вместо словаря; разбирается при первом
+    обращении (parse) и дальше держит готовое значение.
+    """
+
+    __slots__ = ("text", "start", "end", "value")
+
+    def __init__(self, text: str, start: int, end: int) -> None:
+        self.text = text
+        self.start = start
+        self.end = end
+        self.value: Any = None
+
+    def parse(self) -> Any:
+        if self.value is None:
+            self.value = json_load_relaxed(self.text[self.start:self.end], intern_strings=True)
+        return self.value
+
+    def peek(self) -> Any:
+        """Значение без запоминания: для разовых проходов вроде индексации."""
+        if self.value is not None:
+            return self.value
+        return json_load_relaxed(self.text[self.start:self.end], intern_strings=True)
+
+
+class ObjectList:
+    """
+    Упорядоченный список объектов с удалением за O(1).
+
+    Внутри — словарь id(объекта) → объект: порядок вставки сохраняется,
+    а найти и убрать конкретный объект не требует обхода. Объекты
+    различаются по идентичности, как и раньше при поиске через "is".
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        self._items: Dict[int, Any] = {id(item): item for item in items}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items.values())
+
+    def __contains__(self, item: Any) -> bool:
+        return id(item) in self._items
+
+    def __repr__(self) -> str:
+        return f"ObjectList({list(self._items.values())!r})"
+
+    def append(self, item: Any) -> None:
+        self._items[id(item)] = item
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self._items[id(item)] = item
+
+    def discard(self, item: Any) -> bool:
+        """Убирает item, если он есть; возвращает, был ли он."""
+        return self._items.pop(id(item), None) is not None
+
+    def index(self, item: Any) -> int:
+        """Номер item по порядку — за O(n)."""
+        return list(self._items).index(id(item))
+
+
+def resolve_entry(entry: Any) -> Any:
+    """Значение элемента ModProject.files (ленивый разбирается)."""
+    if type(entry) is LazyEntry:
+        return entry.parse()
+    return entry
+
+
+def peek_entry(entry: Any) -> Any:
+    """Как resolve_entry, но ленивый элемент остаётся неразобранным."""
+    if type(entry) is LazyEntry:
+        return entry.peek()
+    return entry
+
+
+def object_id(schema_key: str, data: Dict[str, Any]) -> str:
+    val = data.get(COMPILED_SCHEMAS[schema_key].id_field)
+    if val is None:
+        for k in ID_FALLBACK_KEYS:
+            if k in data:
+                val = data.get(k)
+                break
+    return str(val) if val is not None else ""
+
+
+def object_display_name(schema_key: str, data: Dict[str, Any]) -> str:
+    val = data.get(COMPILED_SCHEMAS[schema_key].display_field)
+    if isinstance(val, dict):
+        if "str" in val:
+            return str(val["str"])
+        for v in val.values():
+            if isinstance(v, str):
+                return v
+    if val is not None:
+        return str(val)
+    return object_id(schema_key, data) or "<без имени>"
+
+
+@dataclass(eq=False, repr=False)
 class ModObject:
+    # объектов бывает сотни тысяч, поэтому без __dict__;
+    # сравнение по идентичности (eq=False) — два одинаковых объекта всё равно разные
+    __slots__ = ("schema_key", "json_type", "file_path", "entry", "_id", "_display_name", "_label")
+
     schema_key: str
     json_type: str
     file_path: Path
-    data: Dict[str, Any]
+    # то, что лежит в ModProject.files: сам словарь или LazyEntry
+    entry: Any
+
+    def __post_init__(self) -> None:
+        self._id: Optional[str] = None
+        self._display_name: Optional[str] = None
+        self._label: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"ModObject({self.schema_key!r}, {self.get_id()!r}, {self.file_path.name!r})"
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return resolve_entry(self.entry)
+
+    def invalidate(self) -> None:
+        """Сбросить закэшированные id/имя/подпись — вызывать после правки data."""
+        self._id = None
+        self._display_name = None
+        self._label = None
 
     def get_id(self) -> str:
-        schema = SCHEMAS[self.schema_key]
-        id_field = schema["id_field"]
-        val = self.data.get(id_field)
-        if val is None:
-            for k in ("id", "ident", "abstract"):
-                if k in self.data:
-                    val = self.data.get(k)
-                    break
-        return str(val) if val is not None else ""
+        if self._id is None:
+            self._id = object_id(self.schema_key, self.data)
+        return self._id
 
     def get_display_name(self) -> str:
-        schema = SCHEMAS[self.schema_key]
-        disp = schema.get("display_field", "id")
-        val = self.data.get(disp)
-        if isinstance(val, dict):
-            if "str" in val:
-                return str(val["str"])
-            for v in val.values():
-                if isinstance(v, str):
-                    return v
-        if val is not None:
-            return str(val)
-        return self.get_id() or "<без имени>"
+        if self._display_name is None:
+            self._display_name = object_display_name(self.schema_key, self.data)
+        return self._display_name
 
     def label(self) -> str:
-        i = self.get_id()
-        n = self.get_display_name()
-        if i and n and i != n:
-            return f"{i} — {n}"
-        return i or n or "<объект>"
+        if self._label is None:
+            i = self.get_id()
+            n = self.get_display_name()
+            if i and n and i != n:
+                self._label = f"{i} — {n}"
+            else:
+                self._label = i or n or "<объект>"
+        return self._label
 
 
 class ModProject:
-    def __init__(self) -> None:
+    def __init__(self, load_workers: Optional[int] = None,
+                 cache: Optional[ParseCache] = None,
+                 lazy: bool = False) -> None:
+        # сколько процессов использовать при загрузке папки и сохранении;
+        # None — по числу ядер, 0/1 — всё в этом процессе
+        self.load_workers = load_workers
+        # дисковый кэш разобранных файлов (None — всегда разбирать заново)
+        self.cache = cache
+        # ленивая загрузка: при открытии только индексируем объекты,
+        # а разбираем каждый при первом обращении к его data
+        self.lazy = lazy
         self.root: Optional[Path] = None
-        self.files: Dict[Path, List[Dict[str, Any]]] = {}
-        self.objects_by_schema: Dict[str, List[ModObject]] = {}
-        self.ids_by_type: Dict[str, set[str]] = {}
+        # объекты верхнего уровня каждого файла: словари или LazyEntry
+        # объекты файлов и категорий; ObjectList — чтобы удаление было O(1)
+        self.files: Dict[Path, ObjectList] = {}
+        self.objects_by_schema: Dict[str, ObjectList] = {}
+        # id по json_type: отсортированы, дубликаты посчитаны
+        self.id_registry = IdRegistry()
+        # кто на кого ссылается через ref_list-поля
+        self.references = ReferenceIndex()
+        # нечёткий поиск по id и имени (фильтр над деревом)
+        self.name_index = NameIndex()
+        # полнотекстовый поиск по всем строкам и ключам data
+        self.text_index = TextIndex(lambda obj: peek_entry(obj.entry))
+        # ставятся ли объекты в text_index. В ленивом режиме нет: построение
+        # индекса разобрало бы все LazyEntry сразу после загрузки, поэтому его
+        # строим при первом поиске по тексту (см. find_text)
+        self.text_indexing = not lazy
+        # файлы, которые на диске не такие, как в проекте: элементы добавлены,
+        # удалены или изменены (см. _update_dirty); пересчитывается при каждой правке
         self.dirty_files: set[Path] = set()
+        # что лежит в файлах на диске — по этому при сохранении нетронутые
+        # элементы копируются из файла как есть (см. saving.splice_text)
+        self.origins: Dict[Path, FileOrigin] = {}
+        # элементы, содержимое которых сейчас не то, что на диске: id → элемент
+        # (ссылка держит элемент живым, так что его id не достанется другому)
+        self.changed_entries: Dict[int, Any] = {}
+        # текст элементов для записи (cdda_format.format_element): id → (элемент, текст);
+        # обновляется при правке, так что форматируется только изменённое
+        self.formatted: Dict[int, Tuple[Any, str]] = {}
+        # элементы, какими они лежат на диске: id → (элемент, content_hash, id объекта).
+        # Считаются не при загрузке, а при первой правке (см. _baseline) и
+        # при сохранении — для записанного; удалённые из проекта остаются
+        # до сохранения (их id нужен журналу)
+        self.baselines: Dict[int, Tuple[Any, int, Optional[str]]] = {}
+        # разобранный с диска файл для _baseline: (путь, его origin, номер по id элемента, значения)
+        self._disk_items: Optional[Tuple[Path, FileOrigin, Dict[int, int], List[Any]]] = None
+        # журнал несохранённых правок; None — не ведётся (до _open_journal)
+        self.journal: Optional[EditJournal] = None
+        # записи журнала о ещё не загруженных файлах: проигрываются в add_parsed_file
+        self._pending_journal: Dict[Path, List[JournalRecord]] = {}
+        # файлы, для которых в журнал уже записано их состояние на диске (запись "file")
+        self._journaled_files: set[Path] = set()
+        # объекты, созданные в этом сеансе: id элемента → объект (для пересборки журнала)
+        self._created: Dict[int, ModObject] = {}
+        # сколько правок восстановлено из журнала при открытии
+        self.restored_edits = 0
 
     def clear(self) -> None:
         self.root = None
         self.files.clear()
         self.objects_by_schema.clear()
-        self.ids_by_type.clear()
+        self.id_registry.clear()
+        self.references.clear()
+        self.name_index.clear()
+        self.text_index.clear()
+        self.text_indexing = not self.lazy
         self.dirty_files.clear()
+        self.origins.clear()
+        self.changed_entries.clear()
+        self.formatted.clear()
+        self.baselines.clear()
+        self._disk_items = None
+        # сам файл журнала остаётся: в нём правки, которые не сохранили
+        self.close_journal()
+        self.journal = None
+        self._journaled_files.clear()
+        self._pending_journal.clear()
+        self._created.clear()
+        self.restored_edits = 0
+
+    def _update_dirty(self, path: Path) -> None:
+        """Файл изменён, если состав элементов не тот, что на диске, или какой-то из них правлен."""
+        entries = self.files.get(path, ())
+        origin = self.origins.get(path)
+        if origin is None:
+            # файла на диске нет (или не прочитать): пустой и создавать незачем
+            dirty = bool(entries)
+        else:
+            changed = self.changed_entries
+            dirty = (
+                len(entries) != len(origin[2])
+                or any(map(is_not, entries, origin[2]))
+                or any(map(changed.__contains__, map(id, entries)))
+            )
+        if dirty:
+            self.dirty_files.add(path)
+        else:
+            self.dirty_files.discard(path)
+
+    def _baseline(self, obj: ModObject) -> Optional[int]:
+        """content_hash элемента объекта, каким он лежит на диске; None — не узнать (новый, файл поменяли)."""
+        entry = obj.entry
+        found = self.baselines.get(id(entry))
+        if found is not None:
+            return found[1]
+        if type(entry) is LazyEntry:
+            # текст ленивого элемента — ровно то, что было в файле
+            value = json_load_relaxed(entry.text[entry.start:entry.end])
+        else:
+            value = self._disk_value(obj.file_path, entry)
+            if value is None:
+                return None
+        baseline = content_hash(format_element(value))
+        disk_id = object_id(obj.schema_key, value) if isinstance(value, dict) else None
+        self.baselines[id(entry)] = (entry, baseline, disk_id)
+        return baseline
 
-    def mark_dirty(self, path: Path) -> None:
-        self.dirty_files.add(path)
+    def _disk_id(self, entry: Any) -> Optional[str]:
+        """id объекта элемента, каким он лежит на диске; None — не узнать."""
+        found = self.baselines.get(id(entry))
+        if found is not None:
+            return found[2]
+        if id(entry) in self.changed_entries:
+            return None
+        # не правлен — на диске то же, что в проекте
+        return value_object_id(peek_entry(entry))
+
+    def _disk_value(self, path: Path, entry: Any) -> Any:
+        """Значение элемента в файле на диске, если файл тот же, что при загрузке/сохранении."""
+        origin = self.origins.get(path)
+        if origin is None:
+            return None
+        cached = self._disk_items
+        if cached is None or cached[0] != path or cached[1] is not origin:
+            # правки обычно идут подряд в одном файле — держим разобранным последний
+            try:
+                st = path.stat()
+                if (st.st_size, st.st_mtime_ns) != origin[:2]:
+                    return None
+                # целиком json разбирает быстрее, чем split_top_level по элементам
+                values = json_load_relaxed(path.read_bytes())
+            except (OSError, ValueError):
+                return None
+            if isinstance(values, dict):
+                values = [values]
+            if not isinstance(values, list) or len(values) != len(origin[2]):
+                return None
+            position = {id(item): i for i, item in enumerate(origin[2])}
+            cached = self._disk_items = (path, origin, position, values)
+        i = cached[2].get(id(entry))
+        return None if i is None else cached[3][i]
+
+    def object_changed(self, obj: ModObject, fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Редактор поменял obj.data: сбрасываем кэши объекта, обновляем
+        индексы и сравниваем содержимое с тем, что на диске, — правка,
+        возвращённая как было, снимает пометку изменённого.
+        fields — какие поля верхнего уровня заданы или удалены (для
+        журнала); None — неизвестно, в журнал пишется объект целиком.
+        """
+        old_id = obj.get_id()
+        obj.invalidate()
+        if obj.get_id() != old_id:
+            self._unregister_id(obj.json_type, old_id)
+            self._register_id(obj)
+        self.name_index.update(obj, search_text(obj.get_id(), obj.get_display_name()))
+        if self.text_indexing:
+            self.text_index.update(obj)
+        self.references.update(obj, object_refs(obj.schema_key, obj.data))
+        entry = obj.entry
+        text = format_element(obj.data)
+        self.formatted[id(entry)] = (entry, text)
+        if content_hash(text) == self._baseline(obj):
+            self.changed_entries.pop(id(entry), None)
+        else:
+            self.changed_entries[id(entry)] = entry
+        self._update_dirty(obj.file_path)
+        if self.journal is not None:
+            self._journal_fields(obj, old_id, fields)
+
+    def referrers_of(self, obj: ModObject) -> Dict[ModObject, Tuple[str, ...]]:
+        """Объекты, которые ссылаются на obj, и поля, через которые ссылаются."""
+        obj_id = obj.get_id()
+        if not obj_id:
+            return {}
+        return self.references.referrers(obj.json_type, obj_id)
+
+    def find_objects(self, query: str, limit: int) -> List[ModObject]:
+        """Объекты, чьи id/имя похожи на query, лучшие первыми (см. NameIndex.search)."""
+        return self.name_index.search(query, limit)
+
+    def find_text(self, query: str, limit: int, exact: bool = False) -> List[TextHit]:
+        """
+        Где в data объектов встречается query: (объект, путь, значение), см. TextIndex.search.
+        В ленивом режиме первый вызов сначала строит индекс (и разбирает все объекты).
+        """
+        if not self.text_indexing:
+            self.text_indexing = True
+            for objs in self.objects_by_schema.values():
+                for obj in objs:
+                    self.text_index.add(obj)
+        return self.text_index.search(query, limit, exact)
 
     def load_from_dir(self, root_path: str) -> None:
-        """Загружаем все json из папки."""
+        """Загружаем все json из папки (при необходимости — в несколько процессов)."""
+        paths = self.begin_load_dir(root_path)
+        for path, parsed in iter_parsed_files(paths, self.load_workers, self.cache, self.lazy):
+            self.add_parsed_file(path, parsed)
+        self.finish_load()
+
+    def begin_load_dir(self, root_path: str) -> List[Path]:
+        """
+        Очищает проект под новую папку и возвращает список её json-файлов.
+
+        Дальше файлы разбираются через iter_parsed_files (хоть в фоне)
+        и вливаются в проект по одному через add_parsed_file. Журнал
+        несохранённых правок открывается сразу (см. _open_journal).
+        """
         self.clear()
         self.root = Path(root_path)
+        paths = list(self.root.rglob("*.json"))
+        self._open_journal(journal_path(self.root), paths)
+        return paths
 
-        for path in self.root.rglob("*.json"):
-            self._load_single_json_file(path)
+    def finish_load(self, complete: bool = True) -> None:
+        """
+        Вызывается после того, как все файлы папки влиты в проект: журнал
+        пересобирается из того, что осталось несохранённым. complete=False —
+        загрузку прервали: журнал не пересобираем, записи о незагруженных
+        файлах в нём остаются и при сохранении (см. _compact_journal).
+        """
+        if self.cache is not None:
+            self.cache.evict()
+        if self.root is None:
+            return
+        if complete:
+            self._compact_journal()
+        elif self._pending_journal:
+            print("[WARN] загрузка прервана: правки из журнала к незагруженным файлам не восстановлены")
 
     def load_from_file(self, file_path: str) -> None:
         """Загружаем только один JSON-файл."""
@@ -81,55 +455,195 @@ class ModProject:
             raise FileNotFoundError(path)
         # корень считаем папкой файла
         self.root = path.parent
+        self._open_journal(journal_path(path), (path,))
         self._load_single_json_file(path)
+        self._compact_journal()
 
     def _load_single_json_file(self, path: Path) -> None:
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json_load_relaxed(f.read())
-        except Exception as e:
-            print(f"[WARN] не могу прочитать {path}: {e}")
-            return
+        self.add_parsed_file(path, parse_json_file(path, self.cache, self.lazy))
 
-        if isinstance(data, dict):
-            objs = [data]
-        elif isinstance(data, list):
-            objs = data
+    def add_parsed_file(self, path: Path, parsed: Union[ParsedFile, IndexedFile]) -> List[ModObject]:
+        """
+        Вливает в проект уже разобранный файл (см. parse_json_file).
+
+        Правки к файлу из журнала проигрываются здесь же, до того как его
+        объекты увидит GUI: пока грузятся остальные файлы, объекты этого уже
+        можно править и удалять, и номера элементов в журнале съехали бы.
+
+        Возвращает объекты файла — по ним GUI достраивает дерево.
+        """
+        if self.lazy:
+            added = self._add_indexed_file(path, parsed)
         else:
-            return
+            added = self._add_objects_file(path, parsed)
+        return self._replay_file(path, added)
 
-        self.files[path] = objs
+    def _add_objects_file(self, path: Path, parsed: ParsedFile) -> List[ModObject]:
+        objs, schema_keys, error = parsed
+        if error is not None:
+            print(f"[WARN] не могу прочитать {path}: {error}")
+            return []
+        if objs is None:
+            return []
 
-        for obj in objs:
-            if not isinstance(obj, dict):
-                continue
-            json_type = obj.get("type")
-            if not isinstance(json_type, str):
+        self.files[path] = ObjectList(objs)
+        self._remember_origin(path)
+
+        added: List[ModObject] = []
+        for obj, schema_key in zip(objs, schema_keys):
+            if not schema_key:
                 continue
-            schema_key = self._schema_for_type(json_type)
+            mo = ModObject(schema_key=schema_key, json_type=obj["type"], file_path=path, entry=obj)
+            self._schema_list(schema_key).append(mo)
+            self._register_id(mo)
+            self._index_for_search(mo)
+            self.references.add(mo, object_refs(schema_key, obj))
+            added.append(mo)
+        return added
+
+    def _add_indexed_file(self, path: Path, indexed: IndexedFile) -> List[ModObject]:
+        text, index, error = indexed
+        if error is not None:
+            print(f"[WARN] не могу прочитать {path}: {error}")
+            return []
+        if text is None:
+            return []
+
+        entries = ObjectList()
+        self.files[path] = entries
+
+        added: List[ModObject] = []
+        for start, end, schema_key, obj_id, name, refs in index:
+            entry = LazyEntry(text, start, end)
+            entries.append(entry)
             if not schema_key:
                 continue
-            mo = ModObject(schema_key=schema_key, json_type=json_type, file_path=path, data=obj)
-            self.objects_by_schema.setdefault(schema_key, []).append(mo)
+            mo = ModObject(schema_key=schema_key, json_type=COMPILED_SCHEMAS[schema_key].json_type,
+                           file_path=path, entry=entry)
+            # подпись для дерева берём из индекса, не разбирая объект
+            mo._id = obj_id
+            mo._display_name = name
+            self._schema_list(schema_key).append(mo)
             self._register_id(mo)
+            self._index_for_search(mo)
+            self.references.add(mo, refs)
+            added.append(mo)
+        self._remember_origin(path)
+        return added
 
-    def _schema_for_type(self, json_type: str) -> Optional[str]:
-        for key, schema in SCHEMAS.items():
-            if schema["json_type"] == json_type:
-                return key
-        return None
+    def _schema_list(self, schema_key: str) -> ObjectList:
+        lst = self.objects_by_schema.get(schema_key)
+        if lst is None:
+            lst = self.objects_by_schema[schema_key] = ObjectList()
+        return lst
+
+    def save_files(self, paths: Iterable[Path]) -> SaveReport:
+        """Записывает файлы проекта (см. saving.save_files); с сохранённых снимается пометка изменённых."""
+        files = []
+        untouched = []
+        missing = []
+        for path in paths:
+            if path not in self.files:
+                missing.append((path, "файл не найден в проекте"))
+                continue
+            plan = self._save_plan(path)
+            if plan is None:
+                untouched.append(path)
+            else:
+                files.append(plan)
+        report = save_files(files, self.load_workers)
+        report.unchanged.extend(untouched)
+        report.errors.extend(missing)
+        saved = report.saved()
+        self.dirty_files.difference_update(saved)
+        changed = self.changed_entries
+        baselines = self.baselines
+        for path in saved:
+            origin = self.origins.get(path)
+            old = {id(entry) for entry in origin[2]} if origin is not None else set()
+            current = set()
+            for entry in self.files[path]:
+                current.add(id(entry))
+                if id(entry) in changed or id(entry) not in old:
+                    # записан заново — на диске теперь его нынешний текст
+                    changed.pop(id(entry), None)
+                    baselines[id(entry)] = (entry, content_hash(self._format_entry(entry)),
+                                            value_object_id(peek_entry(entry)))
+                    self._created.pop(id(entry), None)
+            for key in old - current:
+                # удалённые из файла
+                changed.pop(key, None)
+                baselines.pop(key, None)
+            self._remember_origin(path)
+        # записанное из журнала больше не нужно
+        self._compact_journal()
+        return report
+
+    def _save_plan(self, path: Path) -> Optional[FileToSave]:
+        """
+        Что записать в файл: нетронутые элементы — ссылками на их текст в файле,
+        остальные — текстом в стиле форматтера CDDA. Если файл на диске уже не тот, что загружали
+        (или его ещё нет), пишем все значения заново. None — в файле ничего
+        не поменялось, его не нужно даже читать.
+        """
+        entries = self.files[path]
+        origin = self.origins.get(path)
+        if origin is not None:
+            try:
+                st = path.stat()
+            except OSError:
+                st = None
+            if st is not None and (st.st_size, st.st_mtime_ns) == origin[:2]:
+                position = {id(entry): i for i, entry in enumerate(origin[2])}
+                changed = self.changed_entries
+                pieces = []
+                for entry in entries:
+                    i = position.get(id(entry))
+                    if i is None:
+                        pieces.append((-1, self._format_entry(entry)))
+                    elif id(entry) in changed:
+                        # изменённый пишется на своё место, комментарии перед ним остаются
+                        pieces.append((i, self._format_entry(entry)))
+                    else:
+                        # нетронутый элемент не разбираем, даже если он ленивый
+                        pieces.append((i, None))
+                if len(pieces) == len(origin[2]) and all(
+                        i == n and value is None for n, (i, value) in enumerate(pieces)):
+                    return None
+                return path, pieces, len(origin[2])
+        return path, [(-1, self._format_entry(entry)) for entry in entries], None
+
+    def _format_entry(self, entry: Any) -> str:
+        cached = self.formatted.get(id(entry))
+        if cached is not None:
+            return cached[1]
+        # ленивый элемент разбираем только на время форматирования
+        text = format_element(peek_entry(entry))
+        self.formatted[id(entry)] = (entry, text)
+        return text
+
+    def _remember_origin(self, path: Path) -> None:
+        try:
+            st = path.stat()
+        except OSError:
+            self.origins.pop(path, None)
+            return
+        self.origins[path] = (st.st_size, st.st_mtime_ns, tuple(self.files[path]))
 
     def _register_id(self, obj: ModObject) -> None:
+        # get_id заодно кэширует id: object_changed по нему узнаёт, что id сменился
         obj_id = obj.get_id()
-        if not obj_id:
-            return
-        self.ids_by_type.setdefault(obj.json_type, set()).add(obj_id)
+        if obj_id:
+            self.id_registry.add(obj.json_type, obj_id)
 
-    def get_ids_for_json_type(self, json_type: str) -> List[str]:
-        return sorted(self.ids_by_type.get(json_type, set()))
+    def _index_for_search(self, obj: ModObject) -> None:
+        self.name_index.add(obj, search_text(obj.get_id(), obj.get_display_name()))
+        if self.text_indexing:
+            self.text_index.add(obj)
 
-    def all_objects_for_schema(self, schema_key: str) -> List[ModObject]:
-        return self.objects_by_schema.get(schema_key, [])
+    def _unregister_id(self, json_type: str, obj_id: str) -> None:
+        if obj_id:
+            self.id_registry.remove(json_type, obj_id)
 
     # ---------- НОВОЕ: создание / удаление объектов ----------
 
@@ -146,70 +660,459 @@ class ModProject:
         if self.root is None:
             raise RuntimeError("Неизвестен корень проекта. Сначала открой мод-папку или JSON-файл.")
 
-        schema = SCHEMAS[schema_key]
-        json_type = schema["json_type"]
-
         path = self.root / f"editor_{schema_key}.json"
+        mo = self._append_object(schema_key, path)
+        self._journal_write(path, {"op": "new", "schema": schema_key})
+        return mo
+
+    def _append_object(self, schema_key: str, path: Path) -> ModObject:
+        """Новый объект категории с пустым id в конце файла path."""
+        schema = COMPILED_SCHEMAS[schema_key]
+        json_type = schema.json_type
+
         objs_list = self.files.get(path)
         if objs_list is None:
-            objs_list = []
+            objs_list = ObjectList()
             self.files[path] = objs_list
 
         data: Dict[str, Any] = {"type": json_type}
-        id_field = schema.get("id_field")
-        if id_field:
-            data.setdefault(id_field, "")
+        if schema.id_field:
+            data.setdefault(schema.id_field, "")
 
         objs_list.append(data)
 
-        mo = ModObject(schema_key=schema_key, json_type=json_type, file_path=path, data=data)
-        self.objects_by_schema.setdefault(schema_key, []).append(mo)
+        mo = ModObject(schema_key=schema_key, json_type=json_type, file_path=path, entry=data)
+        self._schema_list(schema_key).append(mo)
+        self._register_id(mo)
+        self._index_for_search(mo)
 
-        # id пока пустой, в реестр добавлять смысла нет
-        self.mark_dirty(path)
+        # ссылок у нового объекта нет — в индекс ссылок добавлять нечего
+        self._created[id(data)] = mo
+        self._update_dirty(path)
         return mo
 
     def delete_object(self, obj: ModObject) -> None:
+        """Удаляет один объект (см. delete_objects)."""
+        self.delete_objects((obj,))
+
+    def delete_objects(self, objs: Iterable[ModObject]) -> List[ModObject]:
         """
-        Удаляет объект из:
+        Удаляет объекты из:
         - списка объектов файла,
         - списка objects_by_schema,
-        - реестра id-шников.
-        """
-        # 1) из файла
-        objs_list = self.files.get(obj.file_path)
-        if objs_list is not None:
-            for i, d in enumerate(objs_list):
-                if d is obj.data:   # по идентичности, а не по содержимому
-                    del objs_list[i]
-                    break
-
-        # 2) из списка по схеме
-        lst = self.objects_by_schema.get(obj.schema_key)
-        if lst is not None:
+        - реестра id-шников, поиска по именам и тексту, индекса ссылок.
+
+        Каждое удаление — O(1), файлы помечаются изменёнными по разу (если
+        ведётся журнал — ещё один проход по каждому затронутому файлу).
+        Возвращает действительно удалённые объекты (уже удалённые пропускаются).
+        """
+        objs = list(objs)
+        # номера элементов в файлах до удаления — для журнала
+        positions: Dict[Path, Dict[int, int]] = {}
+        if self.journal is not None:
+            for path in {obj.file_path for obj in objs}:
+                positions[path] = {id(entry): i for i, entry in enumerate(self.files.get(path, ()))}
+        dropped: Dict[Path, List[int]] = {}
+        ids: Dict[Tuple[Path, int], str] = {}
+        removed: List[ModObject] = []
+        touched_files: set[Path] = set()
+        for obj in objs:
+            # 1) из списка по схеме; если его там нет — объект уже удалён
+            lst = self.objects_by_schema.get(obj.schema_key)
+            if lst is None or not lst.discard(obj):
+                continue
+
+            # 2) из файла (по идентичности, а не по содержимому)
+            objs_list = self.files.get(obj.file_path)
+            if objs_list is not None:
+                objs_list.discard(obj.entry)
+
+            # 3) из реестра id, поисков и индекса ссылок
+            self._unregister_id(obj.json_type, obj.get_id())
+            self.name_index.remove(obj)
+            self.text_index.remove(obj)
+            self.references.remove(obj)
+            self.formatted.pop(id(obj.entry), None)
+            self.changed_entries.pop(id(obj.entry), None)
+            self._created.pop(id(obj.entry), None)
+            at = positions.get(obj.file_path, {}).get(id(obj.entry))
+            if at is not None:
+                dropped.setdefault(obj.file_path, []).append(at)
+                ids[obj.file_path, at] = obj.get_id()
+
+            removed.append(obj)
+            touched_files.add(obj.file_path)
+
+        # 4) пересчитаем, какие файлы теперь не такие, как на диске
+        for path in touched_files:
+            self._update_dirty(path)
+        # 5) в журнал — с конца файла, чтобы номера оставшихся не съезжали
+        for path, indices in dropped.items():
+            for at in sorted(indices, reverse=True):
+                self._journal_write(path, {"op": "drop", "at": at, "id": ids[path, at]})
+        return removed
+
+    # ---------- журнал правок ----------
+
+    def _open_journal(self, path: Path, disk_paths: Iterable[Path]) -> None:
+        """
+        Читает журнал path и дальше ведёт его. Записи раскладываются по
+        файлам: о файлах, которых на диске нет (их создали в редакторе),
+        проигрываются сразу, остальные — когда файл загрузится (см.
+        add_parsed_file). Число восстановленных правок — в restored_edits.
+        """
+        journal = EditJournal(path)
+        try:
+            records = journal.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[WARN] не могу прочитать журнал правок {path}: {e}")
+            return
+        pending = self._pending_journal
+        for record in records:
+            name = record.get("file")
+            if isinstance(name, str):
+                pending.setdefault(self.root / name, []).append(record)
+        self.journal = journal
+        on_disk = set(disk_paths)
+        for file_path in [p for p in pending if p not in on_disk]:
+            self._replay_file(file_path, [])
+
+    def _replay_file(self, path: Path, objs: List[ModObject]) -> List[ModObject]:
+        """
+        Проигрывает отложенные записи журнала о файле path поверх его
+        объектов objs; возвращает объекты файла после этого.
+        """
+        records = self._pending_journal.pop(path, None)
+        if not records:
+            return objs
+        objects = {id(mo.entry): mo for mo in objs}
+        # правки из журнала в него же не пишем: они там уже есть
+        journal, self.journal = self.journal, None
+        try:
+            self.restored_edits += self._replay(path, records, objects)
+        finally:
+            self.journal = journal
+        return list(objects.values())
+
+    def _replay(self, path: Path, records: List[JournalRecord], objects: Dict[int, ModObject]) -> int:
+        name = path.relative_to(self.root).as_posix()
+        # элементы файла по порядку, пока идёт проигрывание
+        entries = list(self.files.get(path, ()))
+        valid = False
+        applied = 0
+        for record in records:
+            if record.get("op") == "file":
+                origin = self.origins.get(path)
+                if record.get("size") is None:
+                    # файл создан в редакторе и так и не записан
+                    valid = origin is None and not path.exists()
+                else:
+                    valid = origin is not None and origin[:2] == (record.get("size"), record.get("mtime"))
+                if not valid:
+                    print(f"[WARN] {name} изменился на диске, правки к нему из журнала пропущены")
+                continue
+            if not valid:
+                continue
             try:
-                lst.remove(obj)
-            except ValueError:
+                self._replay_record(record, path, entries, objects)
+            except (LookupError, TypeError, ValueError) as e:
+                print(f"[WARN] журнал: не могу применить правку к {name} ({e}), остальные к нему пропущены")
+                valid = False
+                continue
+            applied += 1
+        return applied
+
+    def _replay_record(self, record: JournalRecord, path: Path,
+                       entries: List[Any], objects: Dict[int, ModObject]) -> None:
+        op = record.get("op")
+        if op == "new":
+            mo = self._append_object(record["schema"], path)
+            entries.append(mo.entry)
+            objects[id(mo.entry)] = mo
+            return
+        at = record["at"]
+        if type(at) is not int or at < 0:
+            raise ValueError(f"номер элемента {at!r}")
+        obj = objects[id(entries[at])]
+        expected = record.get("id")
+        if expected is not None and obj.get_id() != expected:
+            # номер указывает не на тот объект — правка легла бы не туда
+            raise ValueError(f"элемент {at} — {obj.get_id()!r}, а не {expected!r}")
+        if op == "drop":
+            self.delete_objects((obj,))
+            del objects[id(entries[at])]
+            del entries[at]
+            return
+        if op == "obj":
+            value = record["value"]
+            if not isinstance(value, dict):
+                raise TypeError("объект не словарь")
+            obj.data.clear()
+            obj.data.update(value)
+        elif op == "set":
+            obj.data[record["key"]] = record["value"]
+        elif op == "del":
+            obj.data.pop(record["key"], None)
+        else:
+            raise ValueError(f"неизвестная запись {op!r}")
+        self.object_changed(obj)
+
+    def _journal_write(self, path: Path, record: JournalRecord) -> None:
+        journal = self.journal
+        if journal is None:
+            return
+        name = path.relative_to(self.root).as_posix()
+        try:
+            if path not in self._journaled_files:
+                # от какого состояния файла на диске отсчитываются правки
+                origin = self.origins.get(path)
+                journal.append({"op": "file", "file": name,
+                                "size": origin[0] if origin is not None else None,
+                                "mtime": origin[1] if origin is not None else None})
+                self._journaled_files.add(path)
+            record["file"] = name
+            journal.append(record)
+        except OSError as e:
+            # без журнала всё работает как раньше, только без страховки от сбоя
+            print(f"[WARN] журнал правок отключён: {e}")
+            self.journal = None
+            try:
+                journal.close()
+            except OSError:
                 pass
 
-        # 3) из реестра id
-        obj_id = obj.get_id()
-        if obj_id:
-            s = self.ids_by_type.get(obj.json_type)
-            if s and obj_id in s:
-                s.remove(obj_id)
+    def _journal_fields(self, obj: ModObject, old_id: str, fields: Optional[Iterable[str]]) -> None:
+        """
+        Записи о правке obj; в каждой — id объекта до неё (old_id), по нему
+        при восстановлении проверяется, что номер элемента указывает на тот объект.
+        """
+        entries = self.files.get(obj.file_path)
+        if entries is None or obj.entry not in entries:
+            return
+        at = entries.index(obj.entry)
+        data = obj.data
+        if fields is not None:
+            fields = tuple(fields)
+            id_keys = (COMPILED_SCHEMAS[obj.schema_key].id_field,) + ID_FALLBACK_KEYS
+            if any(key in id_keys for key in fields):
+                # после такой записи id уже другой — пишем объект одной записью
+                fields = None
+        if fields is None:
+            self._journal_write(obj.file_path, {"op": "obj", "at": at, "id": old_id, "value": data})
+            return
+        for key in fields:
+            if key in data:
+                self._journal_write(obj.file_path, {"op": "set", "at": at, "id": old_id,
+                                                    "key": key, "value": data[key]})
+            else:
+                self._journal_write(obj.file_path, {"op": "del", "at": at, "id": old_id, "key": key})
 
-        # 4) отметим файл как изменённый
-        self.mark_dirty(obj.file_path)
+    def _journal_state(self, path: Path) -> List[JournalRecord]:
+        """Записи, которые из файла на диске делают нынешний файл проекта."""
+        name = path.relative_to(self.root).as_posix()
+        origin = self.origins.get(path)
+        old = origin[2] if origin is not None else ()
+        entries = list(self.files.get(path, ()))
+        current = {id(entry) for entry in entries}
+        kept = [entry for entry in old if id(entry) in current]
+        # новые объекты только дописываются в конец, так что оставшиеся идут первыми
+        if any(map(is_not, kept, entries)):
+            print(f"[WARN] журнал: порядок объектов в {name} не записать, его правки не сохранены в журнале")
+            return []
+        records: List[JournalRecord] = [{
+            "op": "file", "file": name,
+            "size": origin[0] if origin is not None else None,
+            "mtime": origin[1] if origin is not None else None,
+        }]
+        for i in range(len(old) - 1, -1, -1):
+            if id(old[i]) not in current:
+                records.append(_with_id({"op": "drop", "file": name, "at": i}, self._disk_id(old[i])))
+        changed = self.changed_entries
+        for at, entry in enumerate(entries):
+            if at >= len(kept):
+                mo = self._created.get(id(entry))
+                if mo is None:
+                    print(f"[WARN] журнал: новый объект в {name} без категории, правки файла не сохранены в журнале")
+                    return []
+                records.append({"op": "new", "file": name, "schema": mo.schema_key})
+                # новый объект создаётся с пустым id
+                disk_id: Optional[str] = ""
+            elif id(entry) not in changed:
+                continue
+            else:
+                disk_id = self._disk_id(entry)
+            records.append(_with_id({"op": "obj", "file": name, "at": at, "value": peek_entry(entry)}, disk_id))
+        return records
+
+    def _compact_journal(self) -> None:
+        """Пересобирает журнал из несохранённого: после сохранения в нём остаётся только оно."""
+        journal = self.journal
+        if journal is None:
+            return
+        records: List[JournalRecord] = []
+        described: set[Path] = set()
+        for path in sorted(self.dirty_files):
+            state = self._journal_state(path)
+            if state:
+                records.extend(state)
+                described.add(path)
+        # о незагруженных файлах (загрузку прервали) — как было
+        for pending in self._pending_journal.values():
+            records.extend(pending)
+        try:
+            journal.rewrite(records)
+        except OSError as e:
+            print(f"[WARN] журнал правок отключён: {e}")
+            self.journal = None
+            return
+        self._journaled_files = described
+
+    def sync_journal(self) -> None:
+        """Досбрасывает журнал на диск (fsync); GUI зовёт по таймеру."""
+        if self.journal is not None:
+            try:
+                self.journal.sync()
+            except OSError as e:
+                print(f"[WARN] журнал правок: {e}")
+
+    def close_journal(self) -> None:
+        if self.journal is not None:
+            try:
+                self.journal.close()
+            except OSError as e:
+                print(f"[WARN] журнал правок: {e}")
+
+    def discard_journal(self) -> None:
+        """Несохранённые правки отброшены — журнал больше не нужен."""
+        if self.journal is not None:
+            try:
+                self.journal.discard()
+            except OSError as e:
+                print(f"[WARN] не могу удалить журнал правок: {e}")
+            self._journaled_files.clear()
 
 
-# "расслабленный" JSON-парсер: убирает комментарии // и /* ... */
-import json
-import re
-from typing import Any
+def value_object_id(value: Any) -> Optional[str]:
+    """id объекта по значению элемента файла; None — тип не из схем."""
+    json_type = value.get("type") if isinstance(value, dict) else None
+    schema_key = schema_key_for_type(json_type) if isinstance(json_type, str) else None
+    return object_id(schema_key, value) if schema_key else None
 
 
-def json_load_relaxed(text: str) -> Any:
-    text = re.sub(r"//.*", "", text)
-    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
-    return json.loads(text)
+def _with_id(record: JournalRecord, obj_id: Optional[str]) -> JournalRecord:
+    # без id запись проигрывается без проверки объекта
+    if obj_id is not None:
+        record["id"] = obj_id
+    return record
+
+
+def parse_json_file(path: Path, cache: Optional[ParseCache] = None,
+                    lazy: bool = False) -> Union[ParsedFile, IndexedFile]:
+    """
+    Читает и разбирает один JSON-файл и раскладывает объекты по схемам.
+
+    Вызывается и в процессах-воркерах, поэтому ничего не трогает в проекте
+    и не печатает: ошибка возвращается третьим элементом.
+    Если передан cache, то неизменившийся файл берётся из него без разбора.
+    При lazy вместо объектов возвращается текст файла и индекс (IndexedFile).
+    """
+    kind = "index" if lazy else "objects"
+    try:
+        if cache is not None:
+            st = path.stat()
+            cached = cache.get(path, st, kind)
+            if cached is not None:
+                return cached[0], cached[1], None
+        with path.open("rb") as f:
+            raw = f.read()
+        if lazy:
+            parsed = _index_text(raw.decode("utf-8-sig"))
+        else:
+            parsed = _classify_parsed(json_load_relaxed(raw, intern_strings=True))
+    except Exception as e:
+        return None, [], str(e)
+
+    if cache is not None and parsed[0] is not None:
+        cache.put(path, st, raw, (parsed[0], parsed[1]), kind)
+    return parsed
+
+
+def _index_text(text: str) -> IndexedFile:
+    items = split_top_level(text)
+    if items is None:
+        return None, [], None
+
+    index: List[IndexEntry] = []
+    for start, end, obj in items:
+        json_type = obj.get("type") if isinstance(obj, dict) else None
+        schema_key = schema_key_for_type(json_type) if isinstance(json_type, str) else None
+        if schema_key:
+            index.append((start, end, schema_key,
+                          object_id(schema_key, obj), object_display_name(schema_key, obj),
+                          object_refs(schema_key, obj)))
+        else:
+            index.append((start, end, None, "", "", {}))
+    return text, index, None
+
+
+def _classify_parsed(data: Any) -> ParsedFile:
+    if isinstance(data, dict):
+        objs = [data]
+    elif isinstance(data, list):
+        objs = data
+    else:
+        return None, [], None
+
+    schema_keys: List[Optional[str]] = []
+    for obj in objs:
+        json_type = obj.get("type") if isinstance(obj, dict) else None
+        schema_keys.append(schema_key_for_type(json_type) if isinstance(json_type, str) else None)
+    return objs, schema_keys, None
+
+
+def _parse_json_file_packed(path: Path, cache: Optional[ParseCache] = None,
+                            lazy: bool = False) -> bytes:
+    # из воркера отдаём marshal, а не pickle: он быстрее и сохраняет
+    # интернированность строк, так что в главном процессе они снова общие
+    return marshal.dumps(parse_json_file(path, cache, lazy))
+
+
+def iter_parsed_files(paths: List[Path],
+                      workers: Optional[int] = None,
+                      cache: Optional[ParseCache] = None,
+                      lazy: bool = False) -> Iterator[Tuple[Path, Union[ParsedFile, IndexedFile]]]:
+    """
+    Разбирает файлы пулом процессов и отдаёт результаты в исходном порядке.
+
+    При workers 0/1, малом числе файлов или если пул не поднялся —
+    разбираем последовательно в текущем процессе.
+    """
+    parse = partial(parse_json_file, cache=cache, lazy=lazy)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        for path in paths:
+            yield path, parse(path)
+        return
+
+    chunksize = max(1, len(paths) // (workers * 8))
+    done = 0
+    try:
+        # не fork: пул поднимается из QThread, а fork многопоточного процесса
+        # может унести в воркер чужую захваченную блокировку
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            packed_parse = partial(_parse_json_file_packed, cache=cache, lazy=lazy)
+            for packed in pool.map(packed_parse, paths, chunksize=chunksize):
+                yield paths[done], marshal.loads(packed)
+                done += 1
+        finally:
+            # если загрузку бросили на полпути, не ждём ещё не начатые файлы
+            pool.shutdown(wait=True, cancel_futures=True)
+    except (OSError, RuntimeError) as e:
+        # BrokenProcessPool тоже RuntimeError; доделываем остаток сами
+        print(f"[WARN] параллельная загрузка не удалась ({e}), читаю последовательно")
+        for path in paths[done:]:
+            yield path, parse(path)
+
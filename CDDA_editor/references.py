@@ -0,0 +1,111 @@
+# references.py
+"""
+Обратный индекс ссылок: кто ссылается на объект с данным id.
+
+Ссылки берутся из полей ref_list схем (prereqs/cancels/leads_to мутаций,
+chat и class у npc, spells у npc_class, professions у сценария и т.д.).
+Индекс строится при загрузке и обновляется по одному объекту при правках,
+так что вопрос "кто ссылается на X" не требует обхода всех объектов.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from schemas import COMPILED_SCHEMAS
+
+# (json_type цели, id цели)
+RefTarget = Tuple[str, str]
+# ссылки одного объекта: цель → поля, в которых она встречается
+ObjectRefs = Dict[RefTarget, Tuple[str, ...]]
+
+
+def _ref_ids(value: Any) -> List[str]:
+    """id из значения ref_list-поля: список строк, но бывает и одиночная строка
+    или список объектов/пар вида {"id": ...} / ["id", уровень]."""
+    if isinstance(value, str):
+        return [value] if value else []
+    if not isinstance(value, list):
+        return []
+    ids = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("id")
+        elif isinstance(item, list) and item:
+            item = item[0]
+        if isinstance(item, str) and item:
+            ids.append(item)
+    return ids
+
+
+def object_refs(schema_key: str, data: Dict[str, Any]) -> ObjectRefs:
+    """Все ссылки объекта по ref_list-полям его схемы."""
+    refs: Dict[RefTarget, List[str]] = {}
+    for field, target_type in COMPILED_SCHEMAS[schema_key].ref_fields.items():
+        value = data.get(field)
+        if value is None:
+            continue
+        for target_id in _ref_ids(value):
+            fields = refs.setdefault((target_type, target_id), [])
+            if field not in fields:
+                fields.append(field)
+    return {target: tuple(fields) for target, fields in refs.items()}
+
+
+class ReferenceIndex:
+    """
+    target → {объект-источник: поля}. Ключом источника служит сам ModObject
+    (сравнение по идентичности), поэтому поиск и правка — O(1).
+    """
+
+    def __init__(self) -> None:
+        self._by_target: Dict[RefTarget, Dict[Any, Tuple[str, ...]]] = {}
+        self._by_source: Dict[Any, ObjectRefs] = {}
+
+    def clear(self) -> None:
+        self._by_target.clear()
+        self._by_source.clear()
+
+    def add(self, source: Any, refs: ObjectRefs) -> None:
+        if not refs:
+            return
+        self._by_source[source] = refs
+        for target, fields in refs.items():
+            self._by_target.setdefault(target, {})[source] = fields
+
+    def remove(self, source: Any) -> None:
+        refs = self._by_source.pop(source, None)
+        if not refs:
+            return
+        for target in refs:
+            sources = self._by_target.get(target)
+            if sources is None:
+                continue
+            sources.pop(source, None)
+            if not sources:
+                del self._by_target[target]
+
+    def update(self, source: Any, refs: ObjectRefs) -> None:
+        """Заменяет ссылки объекта; трогает только цели, которые изменились."""
+        old = self._by_source.get(source, {})
+        if old == refs:
+            return
+        for target in old.keys() - refs.keys():
+            sources = self._by_target.get(target)
+            if sources is not None:
+                sources.pop(source, None)
+                if not sources:
+                    del self._by_target[target]
+        for target, fields in refs.items():
+            self._by_target.setdefault(target, {})[source] = fields
+        if refs:
+            self._by_source[source] = refs
+        else:
+            self._by_source.pop(source, None)
+
+    def referrers(self, json_type: str, target_id: str) -> Dict[Any, Tuple[str, ...]]:
+        """
+        Объекты, ссылающиеся на (json_type, id), и поля, через которые они ссылаются.
+        Отдаётся копия: правка вызывающим или индексом не трогает другую сторону.
+        """
+        sources = self._by_target.get((json_type, target_id))
+        return dict(sources) if sources else {}
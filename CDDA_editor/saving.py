@@ -0,0 +1,273 @@
+# saving.py
+"""
+Запись файлов мода на диск.
+
+Файл не пересобирается целиком: текст нетронутых объектов (с их
+комментариями и форматированием) копируется из файла на диске как есть,
+заново пишутся только изменённые и новые, а удалённые просто выпадают.
+Так дифф в git получается ровно по правке. Текст изменённых объектов
+готовит проект (в стиле json_formatter CDDA, см. cdda_format), а чтение,
+склейка и запись файлов идут пулом процессов, как и разбор при загрузке.
+Если новый текст совпадает с тем, что уже лежит на диске, файл не
+перезаписывается. Запись идёт через временный файл рядом, fsync
+и os.replace: сбой посреди сохранения оставляет либо старый файл, либо
+новый, но никогда не обрезанный.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import marshal
+import multiprocessing
+import os
+import stat
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from cdda_format import INDENT, format_element, format_json, join_elements
+from jsonio import split_top_level, strip_json_comments
+
+# меньше файлов пишем сами: запуск пула дороже
+PARALLEL_MIN_FILES = 8
+
+# права нового файла (у существующего сохраняются его собственные)
+NEW_FILE_MODE = 0o644
+
+# элемент нового файла: (номер элемента в файле на диске, None) — скопировать
+# его текст как есть; (номер, текст) — записать на место этого элемента текст
+# (cdda_format.format_element); (-1, текст) — новый элемент с этим текстом
+Piece = Tuple[int, Optional[str]]
+# файл, его элементы по порядку и сколько элементов в нём сейчас на диске
+# (None — файл пишется целиком заново, копировать нечего)
+FileToSave = Tuple[Path, List[Piece], Optional[int]]
+
+
+@dataclass
+class SaveReport:
+    """Итог сохранения пачки файлов."""
+
+    written: List[Path] = field(default_factory=list)
+    # новый текст совпал с файлом на диске — не трогали
+    unchanged: List[Path] = field(default_factory=list)
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
+
+    def saved(self) -> List[Path]:
+        """Файлы, на диске у которых теперь то же, что в проекте."""
+        return self.written + self.unchanged
+
+    def summary(self) -> str:
+        parts = [f"записано файлов: {len(self.written)}"]
+        if self.unchanged:
+            parts.append(f"без изменений: {len(self.unchanged)}")
+        if self.errors:
+            parts.append(f"ошибок: {len(self.errors)}")
+        return ", ".join(parts)
+
+
+def splice_text(text: str, spans: List[Tuple[int, int]], pieces: List[Piece]) -> Optional[str]:
+    """
+    Собирает новый текст файла из старого (spans — элементы верхнего уровня
+    в text). Скопированные элементы, а также разделители и комментарии между
+    соседними элементами, которые были в файле, берутся из text как есть;
+    изменённый элемент пишется на своё место, новые — в конце, с тем же
+    отступом и переводом строки, что и в файле. Если удалены все элементы,
+    остаётся текст до первого и после последнего. None — так не собрать:
+    в файле нет элементов или файл-объект должен стать массивом.
+    """
+    if not spans:
+        # пустой массив остаётся как был; иначе копировать нечего
+        return None if pieces else text
+    start = spans[0][0]
+    newline = "\r\n" if "\r\n" in text else "\n"
+    if not pieces:
+        head, tail = text[:start].rstrip(), text[spans[-1][1]:]
+        if strip_json_comments(head).strip() != "[":
+            return None
+        if head == "[" and tail.strip() == "]":
+            # комментариев нет — пустой массив, как у форматтера
+            return "[ ]" + newline
+        # комментарии в начале и в конце файла остаются
+        return head + tail
+    if strip_json_comments(text[:start]).strip() != "[":
+        # файл-объект: элемент у него один, и форматтер разворачивает его
+        # как весь файл, а не как элемент массива
+        if len(pieces) != 1:
+            return None
+        i, value = pieces[0]
+        if value is None:
+            return text
+        body = format_json(json.loads(value)).rstrip("\n")
+        if "\r\n" in text:
+            body = body.replace("\n", "\r\n")
+        return text[:start] + body + text[spans[0][1]:]
+    indent = text[text.rfind("\n", 0, start) + 1:start]
+    if indent.strip():
+        # элементы начинаются на строке со скобкой
+        indent = ""
+        separator = ", "
+    else:
+        separator = "," + newline + indent
+
+    out = [text[:start]]
+    # номер в text последнего записанного элемента; после нового — -2, чтобы
+    # следующий за ним не считался соседом
+    previous = -1
+    for i, value in pieces:
+        first = len(out) == 1
+        if i >= 0 and i == previous + 1:
+            # сосед слева тоже был в файле (или это первый элемент файла) — разделитель как был
+            if not first:
+                out.append(text[spans[previous][1]:spans[i][0]])
+        elif i > 0:
+            # соседа слева больше нет: берём разделитель перед элементом без
+            # запятой — так комментарии над элементом остаются при нём
+            gap = text[spans[i - 1][1]:spans[i][0]]
+            lead = gap[strip_json_comments(gap).find(",") + 1:]
+            out.append(lead.lstrip() if first else "," + lead)
+        elif not first:
+            out.append(separator)
+        if value is None:
+            out.append(text[spans[i][0]:spans[i][1]])
+        else:
+            # переводов строк внутри строк JSON не бывает, а все строки текста
+            # элемента, кроме первой, начинаются с отступа элементов INDENT —
+            # меняем его на отступ и перевод строки этого файла
+            out.append(value.replace("\n" + INDENT, newline + indent))
+        previous = i if i >= 0 else -2
+    out.append(text[spans[-1][1]:])
+    return "".join(out)
+
+
+def encode_file(path: Path, pieces: List[Piece], disk_count: Optional[int]) -> bytes:
+    """Новое содержимое файла; бросает ValueError, если файл на диске не тот, что ожидался."""
+    if disk_count is None:
+        return join_elements([value for _, value in pieces]).encode("utf-8")
+    with path.open("rb") as f:
+        raw = f.read()
+    text = raw.decode("utf-8-sig")
+    # значения нужны только если склеить не выйдет, так что без интернирования
+    items = split_top_level(text, intern_strings=False) or []
+    if len(items) != disk_count:
+        raise ValueError("файл изменился на диске после загрузки")
+    spliced = splice_text(text, [(start, end) for start, end, _ in items], pieces)
+    if spliced is not None:
+        bom = codecs.BOM_UTF8 if raw.startswith(codecs.BOM_UTF8) else b""
+        return bom + spliced.encode("utf-8")
+    texts = [format_element(items[i][2]) if value is None else value for i, value in pieces]
+    return join_elements(texts).encode("utf-8")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Пишет data в path через временный файл в той же папке и os.replace."""
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def fsync_dir(path: Path) -> None:
+    """
+    Переименование переживёт сбой питания, только если записана и папка
+    (save_files делает это по разу на папку). На Windows папку так не
+    открыть — там os.replace и так надёжен.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _same_on_disk(path: Path, data: bytes) -> bool:
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with path.open("rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def save_file(path: Path, pieces: List[Piece], disk_count: Optional[int]) -> Tuple[bool, Optional[str]]:
+    """
+    Собирает и записывает один файл.
+
+    Возвращает (записан ли, ошибка). Ничего не печатает и не бросает —
+    вызывается и в процессах-воркерах.
+    """
+    try:
+        data = encode_file(path, pieces, disk_count)
+        if _same_on_disk(path, data):
+            return False, None
+        write_atomic(path, data)
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+
+def _save_file_packed(packed: bytes) -> Tuple[bool, Optional[str]]:
+    # в воркер отдаём marshal: на длинных списках строк он быстрее pickle
+    path, pieces, disk_count = marshal.loads(packed)
+    return save_file(Path(path), pieces, disk_count)
+
+
+def save_files(files: List[FileToSave], workers: Optional[int] = None) -> SaveReport:
+    """
+    Записывает файлы (при необходимости — в несколько процессов).
+
+    Воркеры получают готовый текст элементов, так что правки в проекте
+    после вызова на запись не влияют.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(files))
+
+    results: Optional[List[Tuple[bool, Optional[str]]]] = None
+    if workers > 1 and len(files) >= PARALLEL_MIN_FILES:
+        try:
+            packed = [marshal.dumps((str(path), pieces, count)) for path, pieces, count in files]
+            chunksize = max(1, len(files) // (workers * 8))
+            # не fork: в процессе в это время работают потоки Qt (проверка JSON и т.п.)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(_save_file_packed, packed, chunksize=chunksize))
+        except (OSError, RuntimeError, ValueError) as e:
+            # BrokenProcessPool тоже RuntimeError; уже записанные файлы
+            # при повторе совпадут с диском и останутся как есть
+            print(f"[WARN] параллельное сохранение не удалось ({e}), пишу последовательно")
+    if results is None:
+        results = [save_file(path, pieces, count) for path, pieces, count in files]
+
+    report = SaveReport()
+    for (path, _, _), (written, error) in zip(files, results):
+        if error is not None:
+            report.errors.append((path, error))
+        elif written:
+            report.written.append(path)
+        else:
+            report.unchanged.append(path)
+    for folder in {path.parent for path in report.written}:
+        fsync_dir(folder)
+    return report
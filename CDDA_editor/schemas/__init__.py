@@ -1,5 +1,6 @@
 # schemas/__init__.py
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
 
 from . import (
     mutations,
@@ -28,4 +29,88 @@ for module in (
     eocs,
     meta,
 ):
-    SCHEMAS.update(module.SCHEMA)
\ No newline at end of file
+    SCHEMAS.update(module.SCHEMA)
+
+
+# ---------- скомпилированный реестр ----------
+#
+# SCHEMAS удобно править руками, но ходить по вложенным словарям на каждый
+# объект при загрузке дорого. Ниже один раз при импорте собираем плоские
+# индексы: json_type → схема, готовые имена id/display полей и типы полей.
+
+# запасные ключи id, если в объекте нет id_field схемы
+ID_FALLBACK_KEYS = ("id", "ident", "abstract")
+
+
+def field_kind(meta: Dict[str, Any]) -> str:
+    """Тип поля для фабрики виджетов: поля с choices/options считаются enum."""
+    if meta.get("choices") or meta.get("options"):
+        return "enum"
+    return meta.get("type", "string")
+
+
+def field_choices(meta: Dict[str, Any]) -> Tuple[str, ...]:
+    choices = meta.get("choices") or meta.get("options")
+    if isinstance(choices, (list, tuple)):
+        return tuple(str(ch) for ch in choices)
+    return ()
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    key: str
+    position: int           # порядок в SCHEMAS (для дерева)
+    json_type: str
+    label: str
+    id_field: str
+    display_field: str
+    fields: Dict[str, Dict[str, Any]]
+    field_kinds: Dict[str, str]
+    field_choices: Dict[str, Tuple[str, ...]]
+    # поле ref_list → json_type объектов, на которые оно ссылается
+    ref_fields: Dict[str, str]
+
+
+def json_type_for_ref(ref_type: str) -> str:
+    """ref_type в схемах — ключ схемы или сразу json_type."""
+    schema = SCHEMAS.get(ref_type)
+    return schema.get("json_type", ref_type) if schema else ref_type
+
+
+def _compile(position: int, key: str, schema: Dict[str, Any]) -> CompiledSchema:
+    fields = schema.get("fields", {})
+    return CompiledSchema(
+        key=key,
+        position=position,
+        json_type=schema["json_type"],
+        label=schema.get("label", key),
+        id_field=schema["id_field"],
+        display_field=schema.get("display_field", "id"),
+        fields=fields,
+        field_kinds={name: field_kind(meta) for name, meta in fields.items()},
+        field_choices={
+            name: choices
+            for name, choices in ((name, field_choices(meta)) for name, meta in fields.items())
+            if choices
+        },
+        ref_fields={
+            name: json_type_for_ref(meta["ref_type"])
+            for name, meta in fields.items()
+            if meta.get("type") == "ref_list" and meta.get("ref_type")
+        },
+    )
+
+
+COMPILED_SCHEMAS: Dict[str, CompiledSchema] = {
+    key: _compile(position, key, schema) for position, (key, schema) in enumerate(SCHEMAS.items())
+}
+
+# json_type → ключ схемы; при совпадении json_type выигрывает первая схема
+SCHEMA_BY_JSON_TYPE: Dict[str, str] = {}
+for _compiled in COMPILED_SCHEMAS.values():
+    SCHEMA_BY_JSON_TYPE.setdefault(_compiled.json_type, _compiled.key)
+del _compiled
+
+
+def schema_key_for_type(json_type: str) -> Optional[str]:
+    return SCHEMA_BY_JSON_TYPE.get(json_type)
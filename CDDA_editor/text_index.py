@@ -0,0 +1,279 @@
+# text_index.py
+"""
+Полнотекстовый поиск по всем строкам в data объектов: строковым значениям
+и именам ключей на любой глубине вложенности.
+
+Инвертированный индекс: строка (значение или ключ как есть) → объекты, где
+она встречается. Различных строк в моде в разы меньше, чем вхождений
+("type", флаги, цвета повторяются у тысяч объектов), поэтому подстрока
+ищется не по объектам, а по словарю строк: все они, в нижнем регистре,
+склеены в одну строку через перевод строки, и str.find пробегает её на
+скорости C. Путь внутри JSON в индексе не хранится: его находят, обходя
+только найденные объекты.
+
+Как и в NameIndex, объекты при загрузке только записываются в очередь,
+индекс достраивается через flush(), записи из списков не вычищаются, а
+проверяются при поиске; когда устаревших набирается половина, индекс
+строится заново.
+"""
+from __future__ import annotations
+
+import sys
+from bisect import bisect_right
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# (объект, путь в JSON, строка-значение; None — совпало имя ключа в конце пути)
+TextHit = Tuple[Any, str, Optional[str]]
+
+
+def iter_strings(value: Any, path: str = "") -> Iterator[Tuple[str, str, bool]]:
+    """(путь, строка, это ключ) для каждого ключа и строкового значения внутри value."""
+    if isinstance(value, str):
+        yield path, value, False
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            sub = f"{path}.{key}" if path else str(key)
+            yield sub, key, True
+            yield from iter_strings(item, sub)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from iter_strings(item, f"{path}[{i}]")
+
+
+def _collect(value: Any) -> Set[str]:
+    """Все различные строки value — как iter_strings, но без путей и рекурсии: в разы быстрее."""
+    found: Set[str] = set()
+    stack = [value]
+    pop = stack.pop
+    while stack:
+        value = pop()
+        kind = type(value)
+        if kind is dict:
+            found.update(value)
+            stack.extend(value.values())
+        elif kind is list:
+            stack.extend(value)
+        elif kind is str:
+            found.add(value)
+    return found
+
+
+class TextIndex:
+    """
+    Объекты сравниваются по идентичности. load(объект) отдаёт его data —
+    вызывается только при разносе по индексу и при поиске путей.
+    """
+
+    def __init__(self, load: Callable[[Any], Any]) -> None:
+        self._load = load
+        # объект → его различные строки (интернированы: одна копия на весь индекс)
+        self._strings: Dict[Any, Tuple[str, ...]] = {}
+        # строка → у скольких объектов она есть (словарь живых строк)
+        self._count: Dict[str, int] = {}
+        # строка → объект или список объектов; большинство строк (id, имена) у одного
+        self._objects: Dict[str, Any] = {}
+        # склейка словаря для поиска подстроки: строки в порядке склейки и их начала;
+        # _fresh — новые строки, ещё не дописанные в склейку
+        self._blob = ""
+        self._blob_strings: List[str] = []
+        self._blob_starts: List[int] = []
+        self._fresh: List[str] = []
+        # объекты, ещё не разнесённые по индексу (dict — упорядоченное множество)
+        self._pending: Dict[Any, None] = {}
+        self._entries = 0
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._strings) + len(self._pending)
+
+    def clear(self) -> None:
+        self._strings.clear()
+        self._count.clear()
+        self._objects.clear()
+        self._blob = ""
+        self._blob_strings = []
+        self._blob_starts = []
+        self._fresh = []
+        self._pending.clear()
+        self._entries = 0
+        self._stale = 0
+
+    def add(self, key: Any) -> None:
+        self._pending[key] = None
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self, limit: Optional[int] = None) -> bool:
+        """Разносит по индексу до limit объектов из очереди (None — все). True — очередь не пуста."""
+        pending = self._pending
+        if limit is None or limit >= len(pending):
+            keys = list(pending)
+            pending.clear()
+        else:
+            keys = []
+            for key in pending:
+                keys.append(key)
+                if len(keys) >= limit:
+                    break
+            for key in keys:
+                del pending[key]
+        for key in keys:
+            strings = self._scan(key)
+            self._strings[key] = strings
+            self._link(key, strings)
+        if keys and not pending:
+            # очередь разобрана — склеиваем словарь сейчас, а не на первом поиске
+            self._ensure_blob()
+        return bool(pending)
+
+    def _scan(self, key: Any) -> Tuple[str, ...]:
+        intern = sys.intern
+        return tuple([intern(text) for text in _collect(self._load(key))])
+
+    def _link(self, key: Any, strings: Any) -> None:
+        """Дописывает объект в списки этих строк."""
+        count = self._count
+        objects = self._objects
+        for text in strings:
+            if text in count:
+                count[text] += 1
+                found = objects[text]
+                if type(found) is list:
+                    found.append(key)
+                else:
+                    objects[text] = [found, key]
+            else:
+                # новая строка словаря (или вернувшаяся: из склейки её могли уже выкинуть)
+                count[text] = 1
+                self._fresh.append(text)
+                found = objects.get(text)
+                if found is None:
+                    objects[text] = key
+                elif type(found) is list:
+                    found.append(key)
+                else:
+                    objects[text] = [found, key]
+        self._entries += len(strings)
+
+    def _unlink(self, strings: Any) -> None:
+        """Строки больше не у объекта: его записи в их списках устарели."""
+        count = self._count
+        for text in strings:
+            left = count[text] - 1
+            if left:
+                count[text] = left
+            else:
+                del count[text]
+        self._stale += len(strings)
+
+    def remove(self, key: Any) -> None:
+        if key in self._pending:
+            del self._pending[key]   # ещё не разнесён
+            return
+        strings = self._strings.pop(key, None)
+        if strings is not None:
+            self._unlink(strings)
+            self._outdate()
+
+    def update(self, key: Any) -> None:
+        """data объекта поменялась: дописываем только новые строки."""
+        old = self._strings.get(key)
+        if old is None:
+            if key not in self._pending:
+                self._pending[key] = None
+            return
+        new = self._scan(key)
+        old_set = set(old)
+        new_set = set(new)
+        if old_set == new_set:
+            return
+        self._strings[key] = new
+        self._unlink(old_set - new_set)
+        self._link(key, new_set - old_set)
+        self._outdate()
+
+    def _outdate(self) -> None:
+        if self._stale * 2 > self._entries:
+            # устаревших записей половина — перестраиваем всё заново
+            keys = [*self._pending, *self._strings]
+            self.clear()
+            self._pending = dict.fromkeys(keys)
+
+    # ---------- поиск ----------
+
+    def _ensure_blob(self) -> str:
+        if len(self._blob_strings) > 2 * len(self._count):
+            # в склейке больше половины строк, которых уже нет в словаре
+            self._blob = ""
+            self._blob_strings = []
+            self._blob_starts = []
+            self._fresh = list(self._count)
+        if self._fresh:
+            starts = self._blob_starts
+            position = len(self._blob)
+            parts = []
+            for text in self._fresh:
+                lowered = text.lower()
+                starts.append(position)
+                position += len(lowered) + 1
+                parts.append(lowered)
+            parts.append("")
+            self._blob += "\n".join(parts)
+            self._blob_strings.extend(self._fresh)
+            self._fresh = []
+        return self._blob
+
+    def _matching_strings(self, query: str) -> Iterator[str]:
+        """Живые строки словаря, содержащие query без учёта регистра, каждая по разу."""
+        blob = self._ensure_blob()
+        lowered = query.lower()
+        if "\n" in lowered:
+            return
+        count = self._count
+        strings = self._blob_strings
+        starts = self._blob_starts
+        seen: Set[str] = set()
+        position = blob.find(lowered)
+        while position >= 0:
+            at = bisect_right(starts, position) - 1
+            text = strings[at]
+            if text in count and text not in seen:
+                seen.add(text)
+                yield text
+            # остаток этой строки уже не нужен — продолжаем со следующей
+            position = blob.find(lowered, starts[at + 1] if at + 1 < len(starts) else len(blob))
+
+    def search(self, query: str, limit: int, exact: bool = False) -> List[TextHit]:
+        """
+        Вхождения query в объектах, не больше limit объектов.
+        exact — строка целиком равна query (с учётом регистра), иначе
+        подстрока без учёта регистра; строка, равная запросу, идёт первой.
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        self.flush()
+        matching: Iterable[str] = [query] if query in self._count else []
+        if not exact:
+            matching = chain(matching, self._matching_strings(query))
+        objs: Dict[Any, None] = {}
+        for text in matching:
+            found = self._objects[text]
+            for key in found if type(found) is list else (found,):
+                # запись верна, только если строка всё ещё есть у объекта
+                if key not in objs and text in self._strings.get(key, ()):
+                    objs[key] = None
+                    if len(objs) >= limit:
+                        break
+            if len(objs) >= limit:
+                break
+
+        lowered = query.lower()
+        hits: List[TextHit] = []
+        for key in objs:
+            for path, text, is_key in iter_strings(self._load(key)):
+                if text == query if exact else lowered in text.lower():
+                    hits.append((key, path, None if is_key else text))
+        return hits